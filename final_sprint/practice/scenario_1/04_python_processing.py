@@ -24,13 +24,18 @@ Requirements:
 Follow-up: How would you scale this across multiple data centers?
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Set, Optional
-from collections import defaultdict, deque
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Set, Optional, Tuple
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from array import array
+import sys
 import threading
 
+import numpy as np
+
 
 class EventType(Enum):
     SESSION_START = "session_start"
@@ -60,99 +65,613 @@ SAMPLE_EVENT = UserEvent(
 )
 
 
+if hasattr(np, "bitwise_count"):
+    def _popcount(bits: np.ndarray) -> int:
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits: np.ndarray) -> int:
+        return int(_POPCOUNT_TABLE[bits].sum(dtype=np.int64))
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x: int) -> int:
+    """64-bit finalizer: spreads sequential user_ids over the whole hash space."""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class BitmapActivityBackend:
+    """
+    Exact per-day activity: user_ids are interned to dense indices and each
+    day keeps one bit per index. Day bitmaps are bytearrays so setting a bit
+    is O(1); NumPy views are taken only while OR-ing them together.
+    """
+
+    def __init__(self):
+        self.user_index: Dict[int, int] = {}
+        self.day_bitmaps: Dict[date, bytearray] = {}
+
+    def add(self, day: date, user_id: int) -> Optional[int]:
+        """Mark user_id active on day; returns its dense index, or None if it already was."""
+        index = self.user_index.setdefault(user_id, len(self.user_index))
+        bitmap = self.day_bitmaps.get(day)
+        if bitmap is None:
+            bitmap = self.day_bitmaps[day] = bytearray()
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte >= len(bitmap):
+            bitmap.extend(bytes(byte + 1 - len(bitmap)))
+        elif bitmap[byte] & mask:
+            return None
+        bitmap[byte] |= mask
+        return index
+
+    def day_count(self, day: date) -> int:
+        bitmap = self.day_bitmaps.get(day)
+        return _popcount(np.frombuffer(bitmap, dtype=np.uint8)) if bitmap else 0
+
+    def union(self, days: List[date]) -> Tuple[np.ndarray, int]:
+        """(OR of the day bitmaps, number of distinct users in it)"""
+        bitmaps = [self.day_bitmaps[day] for day in days if day in self.day_bitmaps]
+        union = np.zeros(max((len(b) for b in bitmaps), default=0), dtype=np.uint8)
+        for bitmap in bitmaps:
+            np.bitwise_or(union[:len(bitmap)], np.frombuffer(bitmap, dtype=np.uint8), out=union[:len(bitmap)])
+        return union, _popcount(union)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        return {
+            "day_state": sum(len(b) for b in self.day_bitmaps.values()),
+            # dict slots plus the int keys/values it holds
+            "user_index": sys.getsizeof(self.user_index) + 2 * 28 * len(self.user_index),
+        }
+
+
+class HyperLogLogActivityBackend:
+    """
+    Approximate per-day activity: one HyperLogLog sketch (2**precision one-byte
+    registers) per day. Window unions are the element-wise max of the day
+    sketches, so 7- and 30-day actives merge without any per-user state.
+    Relative standard error is ~1.04 / sqrt(2**precision): 1.6% at 12, 0.8% at 14.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.day_sketches: Dict[date, bytearray] = {}
+        self._alpha = 0.7213 / (1 + 1.079 / self.num_registers)
+
+    def add(self, day: date, user_id: int) -> Optional[int]:
+        """Update the day sketch; returns the register index, or None if no register changed."""
+        x = _splitmix64(user_id & _MASK64)
+        index = x >> (64 - self.precision)
+        remaining = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        sketch = self.day_sketches.get(day)
+        if sketch is None:
+            sketch = self.day_sketches[day] = bytearray(self.num_registers)
+        if rank <= sketch[index]:
+            return None
+        sketch[index] = rank
+        return index
+
+    def estimate(self, registers: np.ndarray) -> int:
+        m = self.num_registers
+        estimate = self._alpha * m * m / float(np.ldexp(1.0, -registers.astype(np.int32)).sum())
+        zeros = int(np.count_nonzero(registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def day_count(self, day: date) -> int:
+        sketch = self.day_sketches.get(day)
+        return self.estimate(np.frombuffer(sketch, dtype=np.uint8)) if sketch else 0
+
+    def union(self, days: List[date]) -> Tuple[np.ndarray, int]:
+        """(register-wise max of the day sketches, estimated distinct users)"""
+        union = np.zeros(self.num_registers, dtype=np.uint8)
+        for day in days:
+            sketch = self.day_sketches.get(day)
+            if sketch is not None:
+                np.maximum(union, np.frombuffer(sketch, dtype=np.uint8), out=union)
+        return union, self.estimate(union)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        return {"day_state": self.num_registers * len(self.day_sketches), "user_index": 0}
+
+
+class RollingActiveUsers:
+    """
+    Exact DAU/WAU/MAU for the latest day, maintained incrementally.
+
+    Keeps each user's last active day (array over the dense user indices of
+    BitmapActivityBackend, so users are interned only once), a count
+    of users per last-active day, and a running total per tracked window. An
+    event that moves a user's last-active day adjusts each window total by at
+    most one; advancing the current day subtracts only the days that slide out.
+    Both are O(changes), never O(window x users).
+    """
+
+    _NEVER = -(1 << 31)
+
+    def __init__(self, windows: Tuple[int, ...] = (1, 7, 30)):
+        self.windows = tuple(sorted(set(windows)))
+        self.last_active_day = array("i")  # dense user index -> date ordinal
+        self.users_by_last_day: Dict[int, int] = defaultdict(int)
+        self.window_totals: Dict[int, int] = {w: 0 for w in self.windows}
+        self.current_day: Optional[int] = None
+
+    def _in_window(self, day: int, window: int) -> bool:
+        return self.current_day - window < day <= self.current_day
+
+    def advance_to(self, day: int):
+        """Move the window end forward to day (ordinal), expiring days that slide out."""
+        if self.current_day is None:
+            self.current_day = day
+            return
+        if day <= self.current_day:
+            return
+        for window in self.windows:
+            if day - self.current_day >= window:
+                total = sum(self.users_by_last_day.get(d, 0) for d in range(day - window + 1, day + 1))
+            else:
+                total = self.window_totals[window] - sum(
+                    self.users_by_last_day.get(d, 0)
+                    for d in range(self.current_day - window + 1, day - window + 1))
+            self.window_totals[window] = total
+        self.current_day = day
+        # Days older than the widest window can no longer be counted
+        oldest = day - self.windows[-1] + 1
+        for d in [d for d in self.users_by_last_day if d < oldest]:
+            del self.users_by_last_day[d]
+
+    def record(self, index: int, day: int):
+        """Record activity of the user with dense index on day (ordinal); late events are fine."""
+        if index >= len(self.last_active_day):
+            self.last_active_day.extend([self._NEVER] * (index + 1 - len(self.last_active_day)))
+        previous = self.last_active_day[index]
+        if day <= previous:
+            return
+        self.advance_to(day)
+        self.last_active_day[index] = day
+        if previous in self.users_by_last_day:
+            self.users_by_last_day[previous] -= 1
+        self.users_by_last_day[day] += 1
+        for window in self.windows:
+            # Only day is known to be recent enough; previous may already have expired
+            self.window_totals[window] += self._in_window(day, window) - (
+                previous != self._NEVER and self._in_window(previous, window))
+
+    def active_users(self, window: int) -> int:
+        return self.window_totals[window]
+
+
 class DAUMAUCalculator:
     """
     Calculate DAU/MAU metrics with rolling time windows
-    
-    TODO: Implement your solution here
-    Requirements:
-    - Track active users for multiple time windows (1, 7, 30 days)
-    - Calculate DAU/MAU ratio efficiently
-    - Handle user activity events in real-time
-    - Memory efficient for billions of users
+
+    Per-day activity lives in a backend chosen at construction:
+    - backend="bitmap" (default): exact, one packed bitmap per day over dense
+      user indices; active users over N days = OR of N bitmaps + popcount
+    - backend="hll": approximate, one HyperLogLog sketch per day; fixed
+      2**precision bytes per day no matter how many users, error set by precision
+    Window unions are cached per (end day, days_back) in an LRU of
+    union_cache_size entries, each indexed under the days it covers, so an
+    event that changes a day drops only the cached windows containing it.
+
+    Queries ending on the latest day for a window in rolling_windows are served
+    by RollingActiveUsers in O(1) as the date advances. They need the bitmap
+    backend's dense user indices: defaults to (1, 7, 30) for "bitmap", and "hll",
+    which keeps no per-user state, does not support them.
     """
-    
-    def __init__(self):
-        # YOUR CODE HERE
-        pass
-        
+
+    def __init__(self, backend: str = "bitmap", precision: int = 14,
+                 rolling_windows: Optional[Tuple[int, ...]] = None, union_cache_size: int = 8):
+        if backend == "bitmap":
+            self.backend = BitmapActivityBackend()
+        elif backend == "hll":
+            self.backend = HyperLogLogActivityBackend(precision)
+        else:
+            raise ValueError(f"unknown backend {backend!r}, expected 'bitmap' or 'hll'")
+        self.union_cache_size = union_cache_size
+        self._union_cache: "OrderedDict[Tuple[date, int], Tuple[np.ndarray, int]]" = OrderedDict()
+        self._windows_by_day: Dict[date, Set[Tuple[date, int]]] = {}  # day -> cached windows covering it
+        if rolling_windows is None:
+            rolling_windows = (1, 7, 30) if backend == "bitmap" else ()
+        if rolling_windows and backend != "bitmap":
+            raise ValueError("rolling_windows need the bitmap backend")
+        self.rolling = RollingActiveUsers(rolling_windows) if rolling_windows else None
+
     def add_user_activity(self, event: UserEvent):
         """
         Record user activity event
-        
-        TODO: Implement your solution here
         """
-        # YOUR CODE HERE
-        pass
-        
+        day = event.timestamp.date()
+        index = self.backend.add(day, event.user_id)
+        if index is not None:
+            self._invalidate(day)
+            if self.rolling is not None:
+                self.rolling.record(index, day.toordinal())
+
+    @staticmethod
+    def _window_days(key: Tuple[date, int]) -> List[date]:
+        end_day, days_back = key
+        return [end_day - timedelta(days=i) for i in range(days_back)]
+
+    def _evict(self, key: Tuple[date, int]):
+        del self._union_cache[key]
+        for day in self._window_days(key):
+            keys = self._windows_by_day[day]
+            keys.discard(key)
+            if not keys:
+                del self._windows_by_day[day]
+
+    def _invalidate(self, day: date):
+        for key in list(self._windows_by_day.get(day, ())):
+            self._evict(key)
+
+    def _window_union(self, end_day: date, days_back: int) -> Tuple[np.ndarray, int]:
+        """Union over (end_day - days_back, end_day], cached."""
+        key = (end_day, days_back)
+        cached = self._union_cache.get(key)
+        if cached is not None:
+            self._union_cache.move_to_end(key)
+            return cached
+        days = self._window_days(key)
+        cached = self.backend.union(days)
+        if self.union_cache_size > 0:
+            if len(self._union_cache) >= self.union_cache_size:
+                self._evict(next(iter(self._union_cache)))
+            self._union_cache[key] = cached
+            for day in days:
+                self._windows_by_day.setdefault(day, set()).add(key)
+        return cached
+
     def get_dau_mau_ratio(self, date: datetime) -> float:
         """
         Get DAU/MAU ratio for specific date
-        
-        TODO: Implement your solution here
+
         Should return ratio between 0.0 and 1.0
         """
-        # YOUR CODE HERE
-        pass
-        
+        mau = self.get_active_users_count(date, 30)
+        # min() guards the approximate backend, where DAU and MAU are separate estimates
+        return min(self.get_active_users_count(date, 1) / mau, 1.0) if mau else 0.0
+
     def get_active_users_count(self, date: datetime, days_back: int) -> int:
         """
         Get count of active users in last N days from given date
-        
-        TODO: Implement your solution here
         """
-        # YOUR CODE HERE
-        pass
+        if days_back <= 0:
+            return 0
+        day = date.date() if isinstance(date, datetime) else date
+        rolling = self.rolling
+        if (rolling is not None and days_back in rolling.window_totals
+                and day.toordinal() == rolling.current_day):
+            return rolling.active_users(days_back)
+        if days_back == 1:
+            return self.backend.day_count(day)
+        return self._window_union(day, days_back)[1]
+
+
+def benchmark_dau_mau_backends(num_users: int = 500_000, daily_active: int = 50_000,
+                               days: int = 30, precisions=(10, 12, 14), seed: int = 1):
+    """
+    Compare the HyperLogLog backend with the exact bitmap backend.
+
+    Each day a random daily_active users out of num_users are active. Reports
+    ingest rate, relative error of DAU/WAU/MAU and memory per backend.
+    """
+    import time
+
+    rng = np.random.default_rng(seed)
+    end = datetime(2025, 1, 31)
+    day_users = [rng.choice(num_users, daily_active, replace=False).tolist() for _ in range(days)]
+    events = [UserEvent(user_id, EventType.SESSION_START, end - timedelta(days=offset), "s")
+              for offset, users in enumerate(day_users) for user_id in users]
+
+    def run(calculator):
+        start = time.perf_counter()
+        for event in events:
+            calculator.add_user_activity(event)
+        rate = len(events) / (time.perf_counter() - start)
+        counts = [calculator.get_active_users_count(end, n) for n in (1, 7, 30)]
+        return rate, counts
+
+    print(f"Benchmark: {num_users:,} users, {daily_active:,} active per day, {days} days")
+    exact = DAUMAUCalculator()
+    rate, truth = run(exact)
+    memory = exact.backend.memory_bytes()
+    print(f"  bitmap       {rate:10,.0f} events/s  DAU/WAU/MAU={truth}  "
+          f"day state={memory['day_state'] / 1e6:.2f} MB  user index={memory['user_index'] / 1e6:.2f} MB")
+    for precision in precisions:
+        approx = DAUMAUCalculator(backend="hll", precision=precision)
+        rate, counts = run(approx)
+        errors = "/".join(f"{abs(c - t) / t:.2%}" for c, t in zip(counts, truth))
+        memory = approx.backend.memory_bytes()
+        print(f"  hll p={precision:<4}   {rate:10,.0f} events/s  error DAU/WAU/MAU={errors}  "
+              f"day state={memory['day_state'] / 1e6:.2f} MB")
+
+
+DEEP_ENGAGEMENT_EVENTS = frozenset({EventType.POST_LIKED, EventType.POST_SHARED, EventType.COMMENT_POSTED})
+
+
+class UserChurnStats:
+    """Compact per-user engagement state kept by ChurnRiskAnalyzer shards."""
+
+    __slots__ = ("last_activity", "last_active_day", "ewma_gap_days", "events", "deep_events")
+
+    def __init__(self):
+        self.last_activity: Optional[datetime] = None
+        self.last_active_day = 0
+        self.ewma_gap_days: Optional[float] = None  # smoothed days between active days
+        self.events = 0
+        self.deep_events = 0  # likes, shares, comments
+
+
+class _ScoreBucket:
+    """
+    Users sharing a last active day, with bounds that upper-bound all their
+    scores: the largest shallowness and the smallest expected gap in the bucket.
+    Bounds only loosen on update and are tightened when the bucket is scanned.
+    """
+
+    __slots__ = ("users", "max_shallowness", "min_expected_gap")
+
+    def __init__(self):
+        self.users: Set[int] = set()
+        self.max_shallowness = 0.0
+        self.min_expected_gap = float("inf")
+
+
+class _ChurnShard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users: Dict[int, UserChurnStats] = {}
+        self.buckets: Dict[int, _ScoreBucket] = {}  # last active day ordinal -> bucket
+        self.latest_activity: Optional[datetime] = None
 
 
 class ChurnRiskAnalyzer:
     """
     Identify users at risk of churning based on engagement patterns
-    
-    TODO: Implement your solution here
-    Requirements:
-    - Track user engagement patterns over time
-    - Calculate churn risk score (0-100)
-    - Identify users with declining activity
-    - Consider recency, frequency, and engagement depth
+
+    Per-user stats live in num_shards lock-striped shards chosen by a hash of
+    user_id, so ingest threads only contend when they hit the same shard. Each
+    user keeps last activity, an EWMA of the gap between active days (their
+    usual frequency) and engagement-depth counters.
+
+    Score (0-100) = 50 * recency + 30 * overdue + 20 * shallowness, each in [0, 1]:
+    - recency: days since last activity / window_days
+    - overdue: days since last activity / (3 * the user's own EWMA gap)
+    - shallowness: share of events that were not likes, shares or comments
+    "Now" is the latest event time seen, so replays score like live traffic.
+
+    Score index: each shard also groups users into buckets by last active day.
+    A bucket's bound (score of its oldest possible activity with its worst
+    shallowness and shortest gap) is computed at query time, so time decay
+    needs no per-user writes, and get_high_risk_users rescores only users in
+    buckets whose bound reaches the threshold.
     """
-    
-    def __init__(self, window_days: int = 30):
-        # YOUR CODE HERE
-        pass
-        
+
+    EWMA_ALPHA = 0.3
+    DEFAULT_GAP_DAYS = 7.0  # expected gap before a user has two active days
+    INLINE_SCAN_SHARDS = 4  # at or below this many shards a pool costs more than it saves
+
+    def __init__(self, window_days: int = 30, num_shards: int = 16, scan_workers: Optional[int] = None):
+        self.window_days = window_days
+        self.shards = [_ChurnShard() for _ in range(num_shards)]
+        self.scan_workers = scan_workers or min(num_shards, 8)
+        self._scan_pool: Optional[ThreadPoolExecutor] = None  # created on first parallel scan, reused
+        self._scan_pool_lock = threading.Lock()
+
+    def _shard(self, user_id: int) -> _ChurnShard:
+        return self.shards[_splitmix64(user_id & _MASK64) % len(self.shards)]
+
     def update_user_activity(self, event: UserEvent):
         """
         Update user activity patterns
-        
-        TODO: Implement your solution here
         """
-        # YOUR CODE HERE
-        pass
-        
-    def get_churn_risk_score(self, user_id: int) -> float:
+        shard = self._shard(event.user_id)
+        day = event.timestamp.toordinal()
+        with shard.lock:
+            stats = shard.users.get(event.user_id)
+            previous_day = None
+            if stats is None:
+                stats = shard.users[event.user_id] = UserChurnStats()
+                stats.last_active_day = day
+            elif day > stats.last_active_day:
+                previous_day = stats.last_active_day
+                gap = day - stats.last_active_day
+                stats.ewma_gap_days = gap if stats.ewma_gap_days is None else (
+                    self.EWMA_ALPHA * gap + (1 - self.EWMA_ALPHA) * stats.ewma_gap_days)
+                stats.last_active_day = day
+            if stats.last_activity is None or event.timestamp > stats.last_activity:
+                stats.last_activity = event.timestamp
+            stats.events += 1
+            stats.deep_events += event.event_type in DEEP_ENGAGEMENT_EVENTS
+            if shard.latest_activity is None or event.timestamp > shard.latest_activity:
+                shard.latest_activity = event.timestamp
+            self._reindex(shard, event.user_id, stats, previous_day)
+
+    def _reindex(self, shard: _ChurnShard, user_id: int, stats: UserChurnStats, previous_day: Optional[int]):
+        """Move the user to the bucket of their last active day and loosen its bounds."""
+        if previous_day is not None:
+            old_bucket = shard.buckets[previous_day]
+            old_bucket.users.discard(user_id)
+            if not old_bucket.users:
+                del shard.buckets[previous_day]
+        bucket = shard.buckets.get(stats.last_active_day)
+        if bucket is None:
+            bucket = shard.buckets[stats.last_active_day] = _ScoreBucket()
+        bucket.users.add(user_id)
+        bucket.max_shallowness = max(bucket.max_shallowness, self._shallowness(stats))
+        bucket.min_expected_gap = min(bucket.min_expected_gap, self._expected_gap(stats))
+
+    def _now(self) -> Optional[datetime]:
+        latest = [shard.latest_activity for shard in self.shards if shard.latest_activity is not None]
+        return max(latest) if latest else None
+
+    def _expected_gap(self, stats: UserChurnStats) -> float:
+        return stats.ewma_gap_days or self.DEFAULT_GAP_DAYS
+
+    @staticmethod
+    def _shallowness(stats: UserChurnStats) -> float:
+        return 1.0 - stats.deep_events / stats.events
+
+    def _combine(self, days_since: float, expected_gap: float, shallowness: float) -> float:
+        """Monotone in each argument: up with days_since and shallowness, down with expected_gap."""
+        recency = min(days_since / self.window_days, 1.0)
+        overdue = min(days_since / (3 * expected_gap), 1.0)
+        return 100.0 * (0.5 * recency + 0.3 * overdue + 0.2 * shallowness)
+
+    def _score(self, stats: UserChurnStats, now: datetime) -> float:
+        days_since = max((now - stats.last_activity).total_seconds() / 86400, 0.0)
+        return self._combine(days_since, self._expected_gap(stats), self._shallowness(stats))
+
+    def get_churn_risk_score(self, user_id: int, as_of: Optional[datetime] = None) -> float:
         """
         Calculate churn risk score for user (0-100)
-        Higher score = higher churn risk
-        
-        TODO: Implement your solution here
-        Consider:
-        - Days since last activity
-        - Change in activity frequency
-        - Engagement depth (likes, shares vs just views)
-        - Session duration trends
+        Higher score = higher churn risk; users never seen score 100
         """
-        # YOUR CODE HERE
-        pass
-        
-    def get_high_risk_users(self, threshold: float = 75.0) -> List[int]:
+        shard = self._shard(user_id)
+        now = as_of or self._now()
+        with shard.lock:
+            stats = shard.users.get(user_id)
+            return 100.0 if stats is None else self._score(stats, now)
+
+    def _scan_shard(self, shard: _ChurnShard, threshold: float, now: datetime) -> List[Tuple[float, int]]:
+        high_risk = []
+        with shard.lock:
+            for day, bucket in shard.buckets.items():
+                # Nobody in the bucket was last active before midnight of its day
+                oldest_days_since = max((now - datetime.fromordinal(day)).total_seconds() / 86400, 0.0)
+                if self._combine(oldest_days_since, bucket.min_expected_gap, bucket.max_shallowness) < threshold:
+                    continue
+                max_shallowness, min_expected_gap = 0.0, float("inf")
+                for user_id in bucket.users:
+                    stats = shard.users[user_id]
+                    score = self._score(stats, now)
+                    if score >= threshold:
+                        high_risk.append((score, user_id))
+                    max_shallowness = max(max_shallowness, self._shallowness(stats))
+                    min_expected_gap = min(min_expected_gap, self._expected_gap(stats))
+                bucket.max_shallowness, bucket.min_expected_gap = max_shallowness, min_expected_gap
+        return high_risk
+
+    def get_high_risk_users(self, threshold: float = 75.0, as_of: Optional[datetime] = None) -> List[int]:
         """
-        Get list of users with churn risk above threshold
-        
-        TODO: Implement your solution here
+        Get list of users with churn risk at or above threshold, highest risk first
+
+        Shards are scanned in parallel on a pool kept for the analyzer's lifetime
+        (inline when there are only a few shards), each under its own lock only,
+        so ingest into other shards continues during the scan. Within a shard
+        only the last-active-day buckets whose score bound reaches threshold are
+        rescored.
         """
-        # YOUR CODE HERE
-        pass
+        now = as_of or self._now()
+        if now is None:
+            return []
+        scan = lambda shard: self._scan_shard(shard, threshold, now)
+        if self.scan_workers <= 1 or len(self.shards) <= self.INLINE_SCAN_SHARDS:
+            per_shard = map(scan, self.shards)
+        else:
+            per_shard = self._pool().map(scan, self.shards)
+        high_risk = [entry for entries in per_shard for entry in entries]
+        high_risk.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [user_id for _, user_id in high_risk]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._scan_pool_lock:
+            if self._scan_pool is None:
+                self._scan_pool = ThreadPoolExecutor(max_workers=self.scan_workers,
+                                                     thread_name_prefix="churn-scan")
+            return self._scan_pool
+
+    def close(self):
+        """Shut down the scan pool; a later query starts a new one."""
+        with self._scan_pool_lock:
+            pool, self._scan_pool = self._scan_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+RETENTION_DAYS = (1, 7, 14, 30)
+COHORT_DEFINITIONS = ("registration", "first_active")
+
+
+def events_to_columns(events: List[UserEvent]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Columnar view of events: (user_ids int64, day ordinals int32), one entry per event.
+    """
+    user_ids = np.fromiter((event.user_id for event in events), dtype=np.int64, count=len(events))
+    days = np.fromiter((event.timestamp.toordinal() for event in events), dtype=np.int32, count=len(events))
+    return user_ids, days
+
+
+def cohort_retention_triangle(user_ids: np.ndarray, days: np.ndarray,
+                              retention_days: Tuple[int, ...] = RETENTION_DAYS) -> Dict[date, Dict[int, float]]:
+    """
+    Day-N retention for every first-seen cohort at once.
+
+    One sort of the packed (user, day) keys gives the distinct active days of
+    each user in order, so a user's first entry is their cohort day (the
+    first-seen reduction). Each later active day becomes an offset from that
+    day, and a single bincount over (cohort, retention day) fills the triangle.
+    (A plain sort + adjacent-difference dedupe; np.unique on the packed keys
+    was ~20x slower at 20M events.)
+    Offsets past the last observed day are left out, which is what makes it a triangle.
+
+    Args:
+        user_ids: User id per event
+        days: Day ordinal per event
+        retention_days: Offsets to report (day 1 = the day after the cohort day)
+
+    Returns:
+        {cohort day: {retention day: share of the cohort active on that day}}
+    """
+    if len(user_ids) == 0:
+        return {}
+    first_day = int(days.min())
+    span = int(days.max()) - first_day + 1
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    lowest_user = int(user_ids.min())
+    if (int(user_ids.max()) - lowest_user + 1) * span < (1 << 62):
+        user_keys = user_ids - lowest_user
+    else:
+        user_keys = np.unique(user_ids, return_inverse=True)[1].astype(np.int64)
+    keys = user_keys * span + (np.asarray(days, dtype=np.int64) - first_day)
+    keys.sort()
+    pairs = keys[np.r_[True, keys[1:] != keys[:-1]]]  # distinct (user, day), grouped by user
+    pair_users, pair_days = np.divmod(pairs, span)
+
+    new_user = np.r_[True, pair_users[1:] != pair_users[:-1]]
+    user_first_day = pair_days[new_user]
+    pair_cohort = user_first_day[np.cumsum(new_user) - 1]
+    cohort_sizes = np.bincount(user_first_day, minlength=span)
+
+    retention_days = tuple(retention_days)
+    slot_of_offset = np.full(span, -1, dtype=np.int64)
+    for slot, offset in enumerate(retention_days):
+        if 0 < offset < span:
+            slot_of_offset[offset] = slot
+    slots = slot_of_offset[pair_days - pair_cohort]
+    keep = slots >= 0
+    cells = np.bincount(pair_cohort[keep] * len(retention_days) + slots[keep],
+                        minlength=span * len(retention_days)).reshape(span, -1)
+
+    triangle = {}
+    for cohort_day in np.flatnonzero(cohort_sizes).tolist():
+        triangle[date.fromordinal(first_day + cohort_day)] = {
+            offset: float(cells[cohort_day, slot] / cohort_sizes[cohort_day])
+            for slot, offset in enumerate(retention_days) if cohort_day + offset < span
+        }
+    return triangle
 
 
 def calculate_cohort_retention(events: List[UserEvent], 
@@ -160,13 +679,11 @@ def calculate_cohort_retention(events: List[UserEvent],
                              cohort_definition: str = "registration") -> Dict[int, float]:
     """
     Calculate retention rates for user cohort over time
-    
-    TODO: Implement your solution here
-    Requirements:
-    - Define cohort (users who registered/first active on specific date)
-    - Calculate retention on Day 1, 7, 14, 30
-    - Return retention percentages by day
-    - Handle large cohort sizes efficiently
+
+    The cohort is every user first seen on cohort_start_date; events carry no
+    separate registration signal, so "registration" and "first_active" both
+    use first activity. Computed over columnar arrays via cohort_retention_triangle,
+    so asking for many cohorts costs one pass (use the triangle directly).
     
     Args:
         events: List of user activity events
@@ -176,9 +693,12 @@ def calculate_cohort_retention(events: List[UserEvent],
     Returns:
         Dict mapping days since cohort start to retention rate
         Example: {1: 0.85, 7: 0.45, 14: 0.32, 30: 0.18}
+        Days not yet observable in the events are omitted; empty if the cohort is empty
     """
-    # YOUR CODE HERE
-    pass
+    if cohort_definition not in COHORT_DEFINITIONS:
+        raise ValueError(f"unknown cohort_definition {cohort_definition!r}, expected one of {COHORT_DEFINITIONS}")
+    cohort_day = cohort_start_date.date() if isinstance(cohort_start_date, datetime) else cohort_start_date
+    return cohort_retention_triangle(*events_to_columns(events)).get(cohort_day, {})
 
 
 def test_dau_mau_calculator():
@@ -203,11 +723,79 @@ def test_dau_mau_calculator():
     # Test DAU/MAU calculation
     ratio = calculator.get_dau_mau_ratio(test_date)
     print(f"DAU/MAU ratio: {ratio}")
+    assert ratio == 0.5
     
     # Test active user counts
     dau = calculator.get_active_users_count(test_date, 1)
     mau = calculator.get_active_users_count(test_date, 30)
     print(f"DAU: {dau}, MAU: {mau}")
+    assert (dau, mau) == (2, 4)
+    assert calculator.get_active_users_count(test_date, 7) == 2
+    assert calculator.get_active_users_count(test_date, 20) == 3
+
+    # Duplicate activity is free; a late event inside a cached window refreshes it
+    calculator.add_user_activity(UserEvent(123, EventType.POST_VIEWED, test_date, "sess1"))
+    assert calculator.get_active_users_count(test_date, 30) == 4
+    calculator.add_user_activity(UserEvent(127, EventType.SESSION_START, test_date - timedelta(days=29), "sess5"))
+    assert calculator.get_active_users_count(test_date, 30) == 5
+    assert calculator.get_active_users_count(test_date - timedelta(days=30), 30) == 0
+
+    # The union cache is a bounded LRU and a new bit drops only the windows covering its day
+    calculator = DAUMAUCalculator(rolling_windows=(), union_cache_size=3)
+    for event in test_events:
+        calculator.add_user_activity(event)
+    for offset in range(10):
+        calculator.get_active_users_count(test_date - timedelta(days=offset), 7)
+    assert len(calculator._union_cache) == 3
+    assert set(calculator._windows_by_day) == {(test_date - timedelta(days=i)).date() for i in range(7, 16)}
+    calculator.add_user_activity(UserEvent(128, EventType.SESSION_START, test_date - timedelta(days=15), "s"))
+    assert list(calculator._union_cache) == [((test_date - timedelta(days=7)).date(), 7),
+                                             ((test_date - timedelta(days=8)).date(), 7)]
+    assert calculator.get_active_users_count(test_date - timedelta(days=9), 7) == 2
+
+    # Bitmap unions agree with plain per-day sets
+    rng = np.random.default_rng(7)
+    calculator, day_sets = DAUMAUCalculator(), defaultdict(set)
+    for user_id, offset in zip(rng.integers(0, 5000, 20000), rng.integers(0, 60, 20000)):
+        day = test_date - timedelta(days=int(offset))
+        calculator.add_user_activity(UserEvent(int(user_id), EventType.SESSION_START, day, "s"))
+        day_sets[day.date()].add(int(user_id))
+    for days_back in (1, 7, 30):
+        expected = set().union(*(day_sets[(test_date - timedelta(days=i)).date()] for i in range(days_back)))
+        assert calculator.get_active_users_count(test_date, days_back) == len(expected)
+
+    # Rolling windows match the bitmap unions as the latest day moves forward
+    calculator = DAUMAUCalculator()
+    reference = DAUMAUCalculator(rolling_windows=())
+    day_offsets = np.sort(rng.integers(0, 90, 30000))
+    for i, (user_id, offset) in enumerate(zip(rng.integers(0, 3000, 30000), day_offsets)):
+        offset = max(int(offset) - int(rng.integers(0, 3)), 0)  # some events arrive up to 2 days late
+        event = UserEvent(int(user_id), EventType.SESSION_START, test_date + timedelta(days=offset), "s")
+        calculator.add_user_activity(event)
+        reference.add_user_activity(event)
+        if i % 997 == 0:
+            latest = datetime.fromordinal(calculator.rolling.current_day)
+            for days_back in (1, 7, 30):
+                assert (calculator.get_active_users_count(latest, days_back)
+                        == reference.get_active_users_count(latest, days_back))
+
+    # HyperLogLog backend: same answers within the sketch error
+    calculator, approx = DAUMAUCalculator(), DAUMAUCalculator(backend="hll", precision=12)
+    for user_id, offset in zip(rng.integers(0, 50000, 100000), rng.integers(0, 30, 100000)):
+        approx.add_user_activity(UserEvent(int(user_id), EventType.SESSION_START,
+                                           test_date - timedelta(days=int(offset)), "s"))
+        calculator.add_user_activity(UserEvent(int(user_id), EventType.SESSION_START,
+                                               test_date - timedelta(days=int(offset)), "s"))
+    for days_back in (1, 7, 30):
+        exact = calculator.get_active_users_count(test_date, days_back)
+        assert abs(approx.get_active_users_count(test_date, days_back) - exact) / exact < 0.05
+    assert 0.0 < approx.get_dau_mau_ratio(test_date) <= 1.0
+    try:
+        DAUMAUCalculator(backend="hll", rolling_windows=(7,))
+        assert False, "hll has no user index for rolling windows"
+    except ValueError:
+        pass
+    print("DAU/MAU calculator checks passed")
 
 
 def test_churn_analyzer():
@@ -249,6 +837,58 @@ def test_churn_analyzer():
     # Test high risk users
     high_risk = analyzer.get_high_risk_users(50.0)
     print(f"High risk users: {high_risk}")
+    assert declining_score > 75.0 > 25.0 > active_score
+    assert high_risk == [200]
+
+    # Concurrent ingest across shards loses no updates
+    analyzer = ChurnRiskAnalyzer(num_shards=8)
+    event_types = list(EventType)
+
+    def ingest(worker: int):
+        for i in range(5000):
+            user_id = (worker * 5000 + i) % 1000
+            analyzer.update_user_activity(UserEvent(
+                user_id, event_types[i % len(event_types)], base_date - timedelta(days=user_id % 40), "s"))
+
+    threads = [threading.Thread(target=ingest, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(stats.events for shard in analyzer.shards for stats in shard.users.values()) == 20000
+    assert sum(len(shard.users) for shard in analyzer.shards) == 1000
+
+    scores = {user_id: analyzer.get_churn_risk_score(user_id) for user_id in range(1000)}
+    assert analyzer.get_high_risk_users(60.0) == sorted(
+        (u for u, score in scores.items() if score >= 60.0), key=lambda u: (-scores[u], u))
+
+    # Bucket index gives the same answer as scoring everyone, at any query time
+    rng = np.random.default_rng(11)
+    analyzer = ChurnRiskAnalyzer(num_shards=4)
+    for user_id, offset, hours, kind in zip(rng.integers(0, 3000, 40000), rng.integers(0, 90, 40000),
+                                            rng.integers(0, 24, 40000), rng.integers(0, len(event_types), 40000)):
+        analyzer.update_user_activity(UserEvent(
+            int(user_id), event_types[kind], base_date - timedelta(days=int(offset), hours=int(hours)), "s"))
+    for as_of in (None, base_date + timedelta(days=10), base_date + timedelta(days=45)):
+        now = as_of or analyzer._now()
+        for threshold in (30.0, 55.0, 80.0, 95.0):
+            expected = sorted(((analyzer._score(stats, now), user_id) for shard in analyzer.shards
+                               for user_id, stats in shard.users.items()), key=lambda e: (-e[0], e[1]))
+            assert analyzer.get_high_risk_users(threshold, as_of) == [u for score, u in expected if score >= threshold]
+    assert analyzer._scan_pool is None  # 4 shards are scanned inline
+
+    # The scan pool is created once and reused across queries
+    analyzer = ChurnRiskAnalyzer(num_shards=16)
+    for user_id in range(100):
+        analyzer.update_user_activity(UserEvent(user_id, EventType.SESSION_START,
+                                                base_date - timedelta(days=user_id % 40), "s"))
+    first = analyzer.get_high_risk_users(50.0)
+    pool = analyzer._scan_pool
+    assert pool is not None and analyzer.get_high_risk_users(50.0) == first and analyzer._scan_pool is pool
+    analyzer.close()
+    assert analyzer._scan_pool is None and analyzer.get_high_risk_users(50.0) == first
+    analyzer.close()
+    print("Churn risk analyzer checks passed")
 
 
 def test_cohort_retention():
@@ -277,12 +917,37 @@ def test_cohort_retention():
     # Calculate retention
     retention = calculate_cohort_retention(test_events, cohort_date)
     print(f"Cohort retention rates: {retention}")
+    assert retention == {1: 2 / 3, 7: 2 / 3, 14: 0.0, 30: 1 / 3}
+
+    # Triangle over many cohorts agrees with per-cohort set arithmetic
+    rng = np.random.default_rng(3)
+    user_ids = rng.integers(0, 2000, 50000)
+    days = rng.integers(0, 60, 50000) + cohort_date.toordinal()
+    triangle = cohort_retention_triangle(user_ids, days)
+    active = defaultdict(set)
+    for user_id, day in zip(user_ids.tolist(), days.tolist()):
+        active[day].add(user_id)
+    first_seen = {}
+    for day in sorted(active):
+        for user_id in active[day]:
+            first_seen.setdefault(user_id, day)
+    for cohort_day, rates in triangle.items():
+        members = {u for u, d in first_seen.items() if d == cohort_day.toordinal()}
+        for offset, rate in rates.items():
+            assert rate == len(members & active[cohort_day.toordinal() + offset]) / len(members)
+    last_cohort = max(triangle)
+    assert list(triangle[last_cohort]) == [k for k in RETENTION_DAYS if last_cohort.toordinal() + k <= days.max()]
+    print("Cohort retention checks passed")
 
 
 if __name__ == "__main__":
     print("Meta DAU/MAU Analytics - Python Processing Challenge")
     print("=" * 60)
     
+    if "--benchmark" in sys.argv:
+        benchmark_dau_mau_backends()
+        sys.exit()
+
     # Run tests to verify your implementation
     test_dau_mau_calculator()
     test_churn_analyzer()
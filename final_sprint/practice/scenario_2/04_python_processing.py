@@ -23,12 +23,16 @@ Requirements:
 Follow-up: How would you scale this to handle 10x traffic during peak hours?
 """
 
+import heapq
 import json
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from collections import defaultdict, deque
 import threading
 
+import numpy as np
+
 
 # Sample streaming event format
 SAMPLE_EVENT = {
@@ -47,61 +51,541 @@ SAMPLE_EVENT = {
 }
 
 
+REQUIRED_FIELDS = frozenset({"event_id", "event_type", "user_id", "video_id", "timestamp"})
+_UTC_EPOCH = datetime(1970, 1, 1)
+_SECOND_CACHE_LIMIT = 1 << 16
+_second_cache: Dict[str, tuple] = {}  # 'YYYY-MM-DDTHH:MM:SS' -> (epoch seconds, naive UTC datetime)
+
+
+def _parse_iso(value: str) -> Optional[tuple]:
+    """
+    ISO-8601 timestamp -> (epoch seconds, naive UTC datetime), or None if unparseable.
+
+    Fast path for 'YYYY-MM-DDTHH:MM:SS[.ffffff][Z]': the whole-second prefix is
+    converted once and cached (a stream hits the same seconds thousands of
+    times), and the fraction is applied as microseconds. Offsets and other
+    forms go through datetime.fromisoformat. Naive timestamps are taken as UTC.
+    """
+    if not isinstance(value, str):
+        return None
+    prefix = value[:19]
+    cached = _second_cache.get(prefix)
+    if cached is None and len(prefix) == 19 and prefix[10] == "T":
+        try:
+            moment = datetime.fromisoformat(prefix)
+        except ValueError:
+            return None
+        if len(_second_cache) >= _SECOND_CACHE_LIMIT:
+            _second_cache.clear()
+        cached = _second_cache[prefix] = (int((moment - _UTC_EPOCH).total_seconds()), moment)
+    if cached is not None:
+        tail = value[19:]
+        if tail[-1:] == "Z":
+            tail = tail[:-1]
+        if not tail:
+            return cached
+        digits = tail[1:]
+        if tail[0] == "." and digits.isascii() and digits.isdigit():
+            micros = int((digits + "00000")[:6])
+            return cached[0] + micros / 1e6, cached[1].replace(microsecond=micros)
+
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _UTC_EPOCH).total_seconds(), moment
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """ISO-8601 timestamp -> epoch seconds (UTC), or None if unparseable."""
+    parsed = _parse_iso(value)
+    return None if parsed is None else parsed[0]
+
+
+def _as_id(value) -> Optional[int]:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():  # "²".isdigit() but int() rejects it
+        return int(value)
+    return None
+
+
 def parse_event(event_json: str) -> Optional[Dict[str, Any]]:
     """
     Parse and validate Reels engagement event
     Return None for invalid events
-    
-    TODO: Implement your solution here
-    Requirements:
-    - Parse JSON safely
-    - Validate required fields: event_id, event_type, user_id, video_id, timestamp
-    - Handle missing/invalid fields gracefully
-    - Extract metadata safely
+
+    One json.loads, one subset check against REQUIRED_FIELDS, then per-field
+    type checks. user_id/video_id (and creator_id if present) become ints,
+    metadata is always a dict, and the timestamp is added as
+    'timestamp_epoch' (float seconds, UTC) and 'parsed_timestamp' (naive UTC datetime).
+    """
+    try:
+        event = json.loads(event_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(event, dict) or not REQUIRED_FIELDS <= event.keys():
+        return None
+
+    user_id, video_id = _as_id(event["user_id"]), _as_id(event["video_id"])
+    event_type, timestamp = event["event_type"], event["timestamp"]
+    if user_id is None or video_id is None or not isinstance(event_type, str) or not isinstance(timestamp, str):
+        return None
+    parsed = _parse_iso(timestamp)
+    if parsed is None:
+        return None
+
+    event["user_id"], event["video_id"] = user_id, video_id
+    if "creator_id" in event:
+        event["creator_id"] = _as_id(event["creator_id"])
+    if not isinstance(event.get("metadata"), dict):
+        event["metadata"] = {}
+    event["timestamp_epoch"], event["parsed_timestamp"] = parsed
+    return event
+
+
+def parse_events(lines) -> Dict[str, Any]:
+    """
+    Bulk variant of parse_event returning columnar arrays (invalid lines skipped).
+
+    Returns:
+        {
+            'event_id': List[str],
+            'event_type': np.int8 codes into 'event_type_names',
+            'event_type_names': List[str],
+            'user_id', 'video_id', 'creator_id' (-1 if missing): np.int64,
+            'timestamp': np.float64 epoch seconds (UTC),
+            'view_duration_ms': np.int64 (0 if missing),
+            'invalid': number of rejected lines
+        }
     """
-    # YOUR CODE HERE
-    pass
+    type_codes: Dict[str, int] = {}
+    event_ids, types, users, videos, creators, timestamps, durations = [], [], [], [], [], [], []
+    invalid = 0
+    for line in lines:
+        event = parse_event(line)
+        if event is None:
+            invalid += 1
+            continue
+        event_ids.append(event["event_id"])
+        types.append(type_codes.setdefault(event["event_type"], len(type_codes)))
+        users.append(event["user_id"])
+        videos.append(event["video_id"])
+        creator_id = event.get("creator_id")
+        creators.append(-1 if creator_id is None else creator_id)
+        timestamps.append(event["timestamp_epoch"])
+        duration = event["metadata"].get("view_duration_ms")
+        durations.append(duration if isinstance(duration, int) and not isinstance(duration, bool) else 0)
+
+    return {
+        "event_id": event_ids,
+        "event_type": np.array(types, dtype=np.int8),
+        "event_type_names": list(type_codes),
+        "user_id": np.array(users, dtype=np.int64),
+        "video_id": np.array(videos, dtype=np.int64),
+        "creator_id": np.array(creators, dtype=np.int64),
+        "timestamp": np.array(timestamps, dtype=np.float64),
+        "view_duration_ms": np.array(durations, dtype=np.int64),
+        "invalid": invalid,
+    }
+
+
+def _parse_event_naive(event_json: str) -> Optional[Dict[str, Any]]:
+    """Baseline for the benchmark: per-field checks and strptime."""
+    try:
+        event = json.loads(event_json)
+        for field in ("event_id", "event_type", "user_id", "video_id", "timestamp"):
+            if field not in event or event[field] is None:
+                return None
+        event["parsed_timestamp"] = datetime.strptime(event["timestamp"], "%Y-%m-%dT%H:%M:%S.%fZ")
+        event["metadata"] = event.get("metadata") or {}
+        return event
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+def benchmark_event_parsing(num_events: int = 200_000):
+    """Events/sec of the naive parser, parse_event and parse_events on synthetic events."""
+    import time
+
+    start = datetime(2025, 1, 15, 12)
+    lines = [json.dumps({**SAMPLE_EVENT,
+                         "event_id": f"evt_{i}",
+                         "user_id": i % 50_000,
+                         "timestamp": (start + timedelta(milliseconds=137 * i)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"})
+             for i in range(num_events)]
+
+    print(f"Benchmark: parsing {num_events:,} events")
+    for name, run in (("naive (strptime)", lambda: [_parse_event_naive(line) for line in lines]),
+                      ("parse_event", lambda: [parse_event(line) for line in lines]),
+                      ("parse_events", lambda: parse_events(lines))):
+        began = time.perf_counter()
+        run()
+        print(f"  {name:<18} {num_events / (time.perf_counter() - began):12,.0f} events/s")
+
+
+def event_epoch(event: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of a raw or parse_event()-ed event, or None if it has no usable time."""
+    epoch = event.get("timestamp_epoch")
+    if epoch is not None:
+        return epoch
+    parsed = event.get("parsed_timestamp")
+    if isinstance(parsed, datetime):
+        return (parsed - _UTC_EPOCH).total_seconds()
+    return parse_timestamp(event.get("timestamp"))
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x: int) -> int:
+    """64-bit finalizer: spreads sequential or strided user_ids over the whole hash space."""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class _MetricsStripe:
+    """
+    One lock stripe of UserMetricsTracker: its users' rows in compact bucket
+    arrays, guarded by a single lock. See UserMetricsTracker for the layout.
+    """
+
+    _GROWTH = 1.5
+
+    def __init__(self, slots: int, initial_capacity: int):
+        self.slots = slots
+        self.user_index: Dict[int, int] = {}
+        self.views = np.zeros((initial_capacity, slots), dtype=np.uint16)
+        self.likes = np.zeros((initial_capacity, slots), dtype=np.uint16)
+        self.engagement_seconds = np.zeros((initial_capacity, slots), dtype=np.float32)
+        self.last_bucket = np.zeros(initial_capacity, dtype=np.int32)
+        self._bind_views()
+        self.latest_bucket = -1
+        self.lock = threading.Lock()
+
+    def _bind_views(self):
+        # Flat memoryviews over the arrays: single-element writes ~3x cheaper than NumPy indexing
+        self._views_flat = memoryview(self.views).cast("B").cast("H")
+        self._likes_flat = memoryview(self.likes).cast("B").cast("H")
+        self._seconds_flat = memoryview(self.engagement_seconds).cast("B").cast("f")
+
+    def row(self, user_id: int) -> int:
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = self.user_index[user_id] = len(self.user_index)
+            if row == len(self.last_bucket):
+                capacity = int(row * self._GROWTH) + 1
+                for view in (self._views_flat, self._likes_flat, self._seconds_flat):
+                    view.release()
+                for name in ("views", "likes", "engagement_seconds", "last_bucket"):
+                    old = getattr(self, name)
+                    grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                    grown[:row] = old
+                    setattr(self, name, grown)
+                self._bind_views()
+            self.last_bucket[row] = -1  # rows start zeroed; nothing to expire
+        return row
+
+    def record(self, row: int, bucket: int, is_view: bool, duration_seconds: float):
+        if bucket > self.latest_bucket:
+            self.latest_bucket = bucket
+        slots = self.slots
+        base = row * slots
+        last = int(self.last_bucket[row])
+        if last < 0:
+            self.last_bucket[row] = bucket
+        elif bucket > last:
+            # Reuse the slots of buckets last+1..bucket (at most one full turn after a long gap)
+            for stale in range(max(last + 1, bucket - slots + 1), bucket + 1):
+                index = base + stale % slots
+                self._views_flat[index] = 0
+                self._likes_flat[index] = 0
+                self._seconds_flat[index] = 0.0
+            self.last_bucket[row] = bucket
+        elif bucket <= last - slots:
+            return  # older than anything this row still holds
+        index = base + bucket % slots
+        if is_view:
+            self._views_flat[index] = min(self._views_flat[index] + 1, 0xFFFF)
+            if duration_seconds:
+                self._seconds_flat[index] += duration_seconds
+        else:
+            self._likes_flat[index] = min(self._likes_flat[index] + 1, 0xFFFF)
+
+    def read(self, user_id: int, now: int):
+        """(views, likes, engagement seconds) in the window ending at bucket now; caller holds the lock."""
+        row = self.user_index.get(user_id)
+        if row is None:
+            return 0, 0, 0.0
+        last = int(self.last_bucket[row])
+        slot_buckets = last - (last - np.arange(self.slots)) % self.slots
+        mask = slot_buckets > now - self.slots
+        return (int(self.views[row, mask].sum()), int(self.likes[row, mask].sum()),
+                float(self.engagement_seconds[row, mask].sum()))
 
 
 class UserMetricsTracker:
     """
     Track 24-hour rolling metrics per user
-    
-    TODO: Implement your solution here
-    Requirements:
-    - Total videos watched
-    - Total engagement time (minutes)
-    - Engagement rate (likes/views ratio)
-    - Memory efficient for 10M+ users
-    - Thread-safe
+
+    Fixed time buckets instead of per-event deques: the window is split into
+    window_hours * 60 / bucket_minutes slots (24 hourly by default, 96 with
+    bucket_minutes=15) and every user owns one row of each compact array:
+    views and likes (uint16, saturating) and engagement seconds (float32), plus
+    the absolute number of the newest bucket written (int32). At 24 slots that
+    is 196 bytes per user regardless of event volume.
+
+    Slot i of a row holds the newest bucket b <= last_bucket with b % slots == i.
+    Moving a user to a newer bucket zeroes only the slots being reused, and
+    reads skip slots older than the window, so expiry is O(1) amortized and
+    nothing ever sweeps all users.
+
+    Error bound: the window covers the current (partial) bucket and the
+    slots - 1 buckets before it, so events between 24h and 24h - bucket_minutes
+    old are already dropped. Counts may undercount by at most one bucket of
+    activity and never overcount. "Now" is the latest event time seen.
+
+    Thread safety: users are hashed onto num_stripes stripes, each with its own
+    arrays and lock, so ingest threads only wait for each other when they touch
+    the same stripe. A read holds the user's stripe lock, so views, likes and
+    engagement time come from one consistent state of the row.
     """
-    
-    def __init__(self, window_hours: int = 24):
-        # YOUR CODE HERE
-        pass
-        
+
+    def __init__(self, window_hours: int = 24, bucket_minutes: int = 60,
+                 num_stripes: int = 32, initial_capacity: int = 1024):
+        if (window_hours * 60) % bucket_minutes:
+            raise ValueError("bucket_minutes must divide the window evenly")
+        self.bucket_seconds = bucket_minutes * 60
+        self.slots = window_hours * 60 // bucket_minutes
+        per_stripe = max(initial_capacity // num_stripes, 16)
+        self.stripes = [_MetricsStripe(self.slots, per_stripe) for _ in range(num_stripes)]
+
+    def _stripe(self, user_id: int) -> _MetricsStripe:
+        # hash() of an int is the int itself, so mix it before taking the stripe
+        return self.stripes[_splitmix64(hash(user_id) & _MASK64) % len(self.stripes)]
+
     def update_user_metrics(self, user_id: int, event: Dict[str, Any]):
         """
         Update rolling 24-hour metrics for user
-        
-        TODO: Implement your solution here
         """
-        # YOUR CODE HERE
-        pass
-        
+        event_type = event.get("event_type")
+        if event_type not in ("video_view", "like"):
+            return
+        epoch = event_epoch(event)
+        if epoch is None:
+            return
+        bucket = int(epoch // self.bucket_seconds)
+        duration_seconds = 0.0
+        if event_type == "video_view":
+            duration = (event.get("metadata") or {}).get("view_duration_ms")
+            if isinstance(duration, (int, float)) and not isinstance(duration, bool) and duration > 0:
+                duration_seconds = duration / 1000
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            stripe.record(stripe.row(user_id), bucket, event_type == "video_view", duration_seconds)
+
+    @property
+    def latest_bucket(self) -> int:
+        return max(stripe.latest_bucket for stripe in self.stripes)
+
     def get_user_metrics(self, user_id: int) -> Dict[str, Any]:
         """
         Get current 24-hour metrics for user
-        
-        TODO: Implement your solution here
-        Should return: {
+
+        Returns: {
             'videos_watched': int,
             'total_engagement_time_minutes': float,
             'engagement_rate': float  # likes/views ratio
         }
         """
-        # YOUR CODE HERE
-        pass
+        now = self.latest_bucket
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            views, likes, seconds = stripe.read(user_id, now)
+        return {
+            'videos_watched': views,
+            'total_engagement_time_minutes': seconds / 60,
+            'engagement_rate': likes / views if views else 0.0,
+        }
+
+
+def benchmark_metrics_tracker(num_events: int = 400_000, thread_counts=(1, 4, 8, 32),
+                              stripe_counts=(1, 32), num_users: int = 100_000):
+    """
+    Multithreaded ingest throughput: one stripe (a global lock) vs many stripes.
+    Every configuration ingests the same events split evenly across threads.
+    """
+    import time
+
+    base = 1_736_900_000
+    events = [(i * 7919 % num_users, {"event_type": "video_view" if i % 4 else "like",
+                                      "timestamp_epoch": base + i * 0.2,
+                                      "metadata": {"view_duration_ms": 12000}})
+              for i in range(num_events)]
+
+    print(f"Benchmark: {num_events:,} events over {num_users:,} users")
+    for num_stripes in stripe_counts:
+        for num_threads in thread_counts:
+            tracker = UserMetricsTracker(num_stripes=num_stripes, initial_capacity=num_users)
+            chunks = [events[i::num_threads] for i in range(num_threads)]
+
+            def ingest(chunk):
+                for user_id, event in chunk:
+                    tracker.update_user_metrics(user_id, event)
+
+            threads = [threading.Thread(target=ingest, args=(chunk,)) for chunk in chunks]
+            began = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            rate = num_events / (time.perf_counter() - began)
+            print(f"  stripes={num_stripes:<3} threads={num_threads:<3} {rate:12,.0f} updates/s")
+
+
+class _VideoWindow:
+    """Per-video rings of views and shares+comments, one slot per bucket, with running totals."""
+
+    __slots__ = ("views", "engagements", "total_views", "total_engagements", "version", "flagged")
+
+    def __init__(self, slots: int):
+        self.views = [0] * slots
+        self.engagements = [0] * slots
+        self.total_views = 0
+        self.total_engagements = 0
+        self.version = 0
+        self.flagged = False
+
+
+class ViralDetector:
+    """
+    Streaming viral-video detection over a sliding window.
+
+    Each video active in the window keeps rings of window / bucket_minutes
+    slots for views and for shares + comments, plus running totals, so its
+    viral coefficient (shares + comments) / views is O(1) to recompute.
+
+    Expiry is driven by time buckets: for every bucket still in the window the
+    detector remembers which videos it touched. When the latest event moves to
+    a new bucket, only those videos lose the expired slot; a video whose totals
+    drop to zero is deleted, so memory is bounded by the videos active in the
+    window. The window is the current partial bucket plus the slots - 1
+    buckets before it (error bound: at most one bucket of the oldest activity
+    is dropped early).
+
+    Videos flagged as viral (coefficient > viral_threshold and at least
+    min_views views) sit in a max-heap keyed by coefficient. Every change
+    pushes a fresh entry and bumps the video's version, older entries are
+    skipped when popped, so trending(k) is O(k log n) plus stale entries
+    discarded along the way.
+    """
+
+    VIEW_EVENTS = frozenset({"video_view"})
+    ENGAGEMENT_EVENTS = frozenset({"share", "comment"})
+
+    def __init__(self, window_hours: int = 2, bucket_minutes: int = 5,
+                 viral_threshold: float = 1.5, min_views: int = 1000):
+        if (window_hours * 60) % bucket_minutes:
+            raise ValueError("bucket_minutes must divide the window evenly")
+        self.bucket_seconds = bucket_minutes * 60
+        self.slots = window_hours * 60 // bucket_minutes
+        self.viral_threshold = viral_threshold
+        self.min_views = min_views
+        self.videos: Dict[int, _VideoWindow] = {}
+        self.touched: Dict[int, set] = {}  # bucket -> video_ids with activity in it
+        self.latest_bucket: Optional[int] = None
+        self._heap: List[tuple] = []  # (-coefficient, video_id, version)
+        self._flagged = 0
+
+    def add_event(self, event: Dict[str, Any]):
+        event_type = event.get("event_type")
+        is_view = event_type in self.VIEW_EVENTS
+        if not is_view and event_type not in self.ENGAGEMENT_EVENTS:
+            return
+        video_id = event.get("video_id")
+        epoch = event_epoch(event)
+        if video_id is None or epoch is None:
+            return
+        bucket = int(epoch // self.bucket_seconds)
+        if self.latest_bucket is None or bucket > self.latest_bucket:
+            self._advance(bucket)
+        elif bucket <= self.latest_bucket - self.slots:
+            return  # late event already outside the window
+
+        video = self.videos.get(video_id)
+        if video is None:
+            video = self.videos[video_id] = _VideoWindow(self.slots)
+        slot = bucket % self.slots
+        if is_view:
+            video.views[slot] += 1
+            video.total_views += 1
+        else:
+            video.engagements[slot] += 1
+            video.total_engagements += 1
+        touched = self.touched.get(bucket)
+        if touched is None:
+            touched = self.touched[bucket] = set()
+        touched.add(video_id)
+        self._reflag(video_id, video)
+
+    def _advance(self, bucket: int):
+        """Make bucket the newest and expire every bucket that falls out of the window."""
+        self.latest_bucket = bucket
+        expired = [b for b in self.touched if b <= bucket - self.slots]
+        for expired_bucket in sorted(expired):
+            slot = expired_bucket % self.slots
+            for video_id in self.touched.pop(expired_bucket):
+                video = self.videos[video_id]
+                video.total_views -= video.views[slot]
+                video.total_engagements -= video.engagements[slot]
+                video.views[slot] = video.engagements[slot] = 0
+                if video.total_views == 0 and video.total_engagements == 0:
+                    del self.videos[video_id]  # its heap entries are now stale
+                    self._flagged -= video.flagged
+                else:
+                    self._reflag(video_id, video)
+
+    def _coefficient(self, video: _VideoWindow) -> Optional[float]:
+        """Viral coefficient if the video qualifies, else None."""
+        if video.total_views < self.min_views:
+            return None
+        coefficient = video.total_engagements / video.total_views
+        return coefficient if coefficient > self.viral_threshold else None
+
+    def _is_current(self, video_id: int, version: int) -> bool:
+        video = self.videos.get(video_id)
+        return video is not None and video.version == version
+
+    def _reflag(self, video_id: int, video: _VideoWindow):
+        """Record that the video changed: invalidate old heap entries, push a new one if viral."""
+        video.version += 1
+        coefficient = self._coefficient(video)
+        if coefficient is not None:
+            heapq.heappush(self._heap, (-coefficient, video_id, video.version))
+        self._flagged += (coefficient is not None) - video.flagged
+        video.flagged = coefficient is not None
+        if len(self._heap) > 2 * self._flagged + 64:
+            self._compact()  # stale entries at most double the heap, amortised O(1) per push
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_current(entry[1], entry[2])]
+        heapq.heapify(self._heap)
+
+    def trending(self, k: Optional[int] = None) -> List[int]:
+        """Flagged video_ids by viral coefficient descending (ties by video_id), at most k."""
+        limit = self._flagged if k is None else min(k, self._flagged)
+        live = []
+        while self._heap and len(live) < limit:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry[1], entry[2]):
+                live.append(entry)
+        for entry in live:
+            heapq.heappush(self._heap, entry)
+        return [video_id for _, video_id, _ in live]
 
 
 def detect_viral_videos(events: List[Dict[str, Any]], 
@@ -111,16 +595,19 @@ def detect_viral_videos(events: List[Dict[str, Any]],
     """
     Return list of video_ids that are trending
     Based on recent engagement patterns
-    
-    TODO: Implement your solution here
-    Requirements:
+
     - Viral coefficient = (shares + comments) / views
-    - Flag videos with coefficient > 1.5 and 1000+ views
-    - Calculate metrics over last 2 hours
-    - Sort by viral coefficient descending
+    - Flag videos with coefficient > viral_threshold and min_views+ views
+    - Metrics over the last window_hours before the latest event
+    - Sorted by viral coefficient descending
+
+    Batch wrapper around ViralDetector; keep a detector alive to get the
+    trending list incrementally instead of rescanning events.
     """
-    # YOUR CODE HERE
-    pass
+    detector = ViralDetector(window_hours=window_hours, viral_threshold=viral_threshold, min_views=min_views)
+    for event in events:
+        detector.add_event(event)
+    return detector.trending()
 
 
 def test_event_parser():
@@ -142,6 +629,36 @@ def test_event_parser():
     incomplete_json = json.dumps(incomplete_event)
     result = parse_event(incomplete_json)
     print(f"Incomplete event result: {result}")
+    assert result is None
+
+    parsed = parse_event(valid_event_json)
+    assert parsed["parsed_timestamp"] == datetime(2025, 1, 15, 14, 30, 45, 123000)
+    assert parsed["metadata"]["view_duration_ms"] == 15000
+    assert parse_event("[1, 2]") is None
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "user_id": None})) is None
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "user_id": "\u00b2"})) is None
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "video_id": "\u0661"})) is None  # Arabic-Indic one
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "user_id": "123"}))["user_id"] == 123
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "timestamp": "2025-01-15T14:30:45.\u00b2Z"})) is None
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "timestamp": "yesterday"})) is None
+    assert parse_event(json.dumps({**SAMPLE_EVENT, "metadata": "oops"}))["metadata"] == {}
+
+    # Fast path agrees with datetime.fromisoformat, including offsets and naive stamps
+    for stamp in ("2025-01-15T14:30:45Z", "2025-01-15T14:30:45.5", "2025-12-31T23:59:59.999999Z",
+                  "2025-01-15T16:30:45.123+02:00", "2025-01-15"):
+        expected = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+        if expected.tzinfo is not None:
+            expected = expected.astimezone(timezone.utc).replace(tzinfo=None)
+        assert parse_timestamp(stamp) == (expected - datetime(1970, 1, 1)).total_seconds(), stamp
+
+    columns = parse_events([valid_event_json, invalid_json, incomplete_json,
+                            json.dumps({**SAMPLE_EVENT, "event_type": "like", "metadata": None})])
+    assert columns["invalid"] == 2
+    assert columns["event_type_names"] == ["video_view", "like"]
+    assert columns["event_type"].tolist() == [0, 1]
+    assert columns["view_duration_ms"].tolist() == [15000, 0]
+    assert columns["timestamp"][0] == parsed["timestamp_epoch"]
+    print("Event parser checks passed")
 
 
 def test_user_metrics():
@@ -174,6 +691,70 @@ def test_user_metrics():
     # Get metrics
     metrics = tracker.get_user_metrics(123)
     print(f"User metrics: {metrics}")
+    assert metrics == {'videos_watched': 1, 'total_engagement_time_minutes': 0.5, 'engagement_rate': 1.0}
+
+    # Buckets expire as time moves on: within one bucket of an exact 24h window
+    tracker = UserMetricsTracker(bucket_minutes=15)
+    start = datetime(2025, 1, 15)
+    events = []
+    for minute in range(0, 48 * 60, 7):
+        events.append((minute, {"event_type": "video_view", "parsed_timestamp": start + timedelta(minutes=minute),
+                                "metadata": {"view_duration_ms": 60000}}))
+        if minute % 21 == 0:
+            events.append((minute, {"event_type": "like", "parsed_timestamp": start + timedelta(minutes=minute)}))
+    for minute, event in events:
+        tracker.update_user_metrics(7, event)
+        if minute % 240 == 0 and event["event_type"] == "video_view":
+            exact_views = sum(1 for m, e in events if e["event_type"] == "video_view" and minute - 24 * 60 < m <= minute)
+            metrics = tracker.get_user_metrics(7)
+            assert exact_views - 15 / 7 - 1 <= metrics['videos_watched'] <= exact_views, (minute, metrics)
+            assert metrics['total_engagement_time_minutes'] == metrics['videos_watched']
+    assert abs(tracker.get_user_metrics(7)['engagement_rate'] - 1 / 3) < 0.01
+
+    # A late event older than the window is ignored; a long idle gap clears the row
+    tracker.update_user_metrics(7, {"event_type": "video_view", "parsed_timestamp": start})
+    before = tracker.get_user_metrics(7)
+    tracker.update_user_metrics(8, {"event_type": "video_view", "parsed_timestamp": start + timedelta(days=5)})
+    assert tracker.get_user_metrics(7)['videos_watched'] == 0 and before['videos_watched'] > 0
+    tracker.update_user_metrics(7, {"event_type": "like", "parsed_timestamp": start + timedelta(days=5)})
+    assert tracker.get_user_metrics(7) == {'videos_watched': 0, 'total_engagement_time_minutes': 0.0,
+                                           'engagement_rate': 0.0}
+    assert tracker.get_user_metrics(999)['videos_watched'] == 0
+
+    # Strided user_ids still spread over every stripe
+    tracker = UserMetricsTracker(num_stripes=32)
+    assert len({id(tracker._stripe(user_id)) for user_id in range(0, 32 * 256, 32)}) == 32
+
+    # Concurrent ingest: nothing lost, and every read is a consistent row
+    tracker = UserMetricsTracker(num_stripes=8, initial_capacity=16)
+    now = datetime(2025, 1, 15, 12)
+    view = {"event_type": "video_view", "parsed_timestamp": now, "metadata": {"view_duration_ms": 60000}}
+    like = {"event_type": "like", "parsed_timestamp": now}
+    torn_reads = []
+
+    def ingest(worker: int):
+        for i in range(4000):
+            user_id = (worker * 4000 + i) % 500
+            tracker.update_user_metrics(user_id, view)
+            tracker.update_user_metrics(user_id, like)
+
+    def read():
+        for i in range(4000):
+            metrics = tracker.get_user_metrics(i % 500)
+            # One minute of viewing per view; likes are recorded right after their view
+            if metrics['total_engagement_time_minutes'] != metrics['videos_watched']:
+                torn_reads.append(metrics)
+
+    threads = [threading.Thread(target=ingest, args=(worker,)) for worker in range(4)]
+    threads.append(threading.Thread(target=read))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not torn_reads
+    assert all(tracker.get_user_metrics(u) == {'videos_watched': 32, 'total_engagement_time_minutes': 32.0,
+                                                'engagement_rate': 1.0} for u in range(500))
+    print("User metrics tracker checks passed")
 
 
 def test_viral_detection():
@@ -201,12 +782,71 @@ def test_viral_detection():
     
     viral_videos = detect_viral_videos(test_events)
     print(f"Viral videos detected: {viral_videos}")
+    assert viral_videos == []  # coefficient 2.0 but only 500 views
+
+    now = datetime(2025, 1, 15, 12)
+
+    def burst(video_id, views, engagements, at):
+        return ([{"video_id": video_id, "event_type": "video_view", "parsed_timestamp": at}] * views
+                + [{"video_id": video_id, "event_type": "share", "parsed_timestamp": at}] * (engagements // 2)
+                + [{"video_id": video_id, "event_type": "comment", "parsed_timestamp": at}] * (engagements - engagements // 2))
+
+    events = (burst(1, 1000, 1600, now - timedelta(minutes=30))     # 1.6
+              + burst(2, 1200, 2400, now - timedelta(minutes=90))   # 2.0
+              + burst(3, 1000, 1500, now - timedelta(minutes=10))   # exactly 1.5: not viral
+              + burst(4, 1000, 3000, now - timedelta(hours=3))      # 3.0 but outside the window
+              + burst(5, 999, 2000, now))                           # too few views
+    assert detect_viral_videos(events) == [2, 1]
+
+    # Streaming: the window slides, flags change, expired videos are dropped
+    detector = ViralDetector()
+    for event in events:
+        detector.add_event(event)
+    assert detector.trending(1) == [2]
+    assert 4 not in detector.videos
+    for event in burst(5, 1, 0, now + timedelta(minutes=1)):
+        detector.add_event(event)
+    assert detector.trending() == [2, 5, 1]  # 2 and 5 tie at 2.0; ties go to the lower id
+    for event in burst(1, 0, 2000, now + timedelta(minutes=35)):
+        detector.add_event(event)  # video 2's burst has left the window
+    assert detector.trending() == [1, 5]    # 3600/1000 vs 2000/1000
+    assert set(detector.videos) == {1, 3, 5}
+    for event in burst(6, 10, 0, now + timedelta(hours=5)):
+        detector.add_event(event)
+    assert detector.trending() == [] and set(detector.videos) == {6}
+
+    # Randomised check against recounting the window from scratch
+    rng = np.random.default_rng(5)
+    detector = ViralDetector(min_views=20, bucket_minutes=5)
+    history = []
+    kinds = ["video_view", "video_view", "share", "comment", "like"]
+    for i in range(20000):
+        at = now + timedelta(seconds=int(i * 3 - rng.integers(0, 600)))
+        event = {"video_id": int(rng.integers(0, 60)), "event_type": kinds[int(rng.integers(0, 5))],
+                 "parsed_timestamp": at}
+        detector.add_event(event)
+        history.append(event)
+        if i % 2500 == 2499:
+            latest = detector.latest_bucket
+            counts = defaultdict(lambda: [0, 0])
+            for e in history:
+                bucket = int(event_epoch(e) // detector.bucket_seconds)
+                if latest - detector.slots < bucket <= latest and e["event_type"] != "like":
+                    counts[e["video_id"]][e["event_type"] != "video_view"] += 1
+            scored = [(eng / views, vid) for vid, (views, eng) in counts.items() if views >= 20 and eng / views > 1.5]
+            assert detector.trending() == [vid for _, vid in sorted(scored, key=lambda x: (-x[0], x[1]))]
+    print("Viral detection checks passed")
 
 
 if __name__ == "__main__":
     print("Meta Reels Analytics - Python Processing Challenge")
     print("=" * 60)
     
+    if "--benchmark" in sys.argv:
+        benchmark_event_parsing()
+        benchmark_metrics_tracker()
+        sys.exit()
+
     # Run tests to verify your implementation
     test_event_parser()
     test_user_metrics()
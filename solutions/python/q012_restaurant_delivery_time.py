@@ -112,8 +112,34 @@ IMPLEMENTATION NOTES:
 - Each driver operates independently with their own timeline
 - Travel time is only added when location actually changes
 - Orders can be carried simultaneously and dropped off in any order
+
+VECTORIZED BATCH PATH (historical analysis):
+For tens of millions of actions the per-action dict lookups dominate. The batch
+path encodes drivers, locations, action types and orders to ints once, then:
+1. Stable-sorts by driver so each driver's timeline is contiguous
+2. Gathers every hop at once with fancy indexing: travel_matrix[prev_idx, idx]
+3. Builds per-driver clocks with a cumulative sum reset at each driver boundary
+4. Matches pick-ups to drop-offs with a sort-based join on (driver, order, position)
+
+MULTI-PROCESS REPLAY (full city-day files):
+Drivers never interact, so calculate_delivery_times_parallel shards drivers by
+a stable hash (crc32) across a process pool. Workers parse byte-range chunks of
+the file in parallel and spill actions per shard, then replay one shard each;
+the parent only merges the order -> time maps into an order-sorted result.
 """
 
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PICK_UP, TRAVEL, DROP_OFF = 0, 1, 2
+ACTION_CODES = {'pick_up': PICK_UP, 'travel': TRAVEL, 'drop_off': DROP_OFF}
+
 def calculate_delivery_times(actions, travel_matrix, location_mapping):
     """
     Calculate and print delivery times for each order based on driver actions.
@@ -138,34 +164,7 @@ def calculate_delivery_times(actions, travel_matrix, location_mapping):
     all_delivery_times = {}
     
     for driver, timeline in driver_timelines.items():
-        current_location = None
-        current_time = 0
-        carrying_orders = {}  # order_no -> pickup_time
-        
-        for action in timeline:
-            location = action['location']
-            action_type = action['action_type']
-            
-            # Calculate travel time if location changed
-            if current_location is not None and current_location != location:
-                from_idx = location_mapping[current_location]
-                to_idx = location_mapping[location]
-                travel_time = travel_matrix[from_idx][to_idx]
-                current_time += travel_time
-            
-            current_location = location
-            
-            if action_type == 'pick_up':
-                order_no = action['order_no']
-                carrying_orders[order_no] = current_time
-                
-            elif action_type == 'drop_off':
-                order_no = action['order_no']
-                if order_no in carrying_orders:
-                    pickup_time = carrying_orders[order_no]
-                    delivery_time = current_time - pickup_time
-                    all_delivery_times[order_no] = delivery_time
-                    del carrying_orders[order_no]
+        all_delivery_times.update(_replay_timeline(timeline, travel_matrix, location_mapping))
     
     # Print results in order number sequence
     sorted_orders = sorted(all_delivery_times.keys())
@@ -173,6 +172,279 @@ def calculate_delivery_times(actions, travel_matrix, location_mapping):
         delivery_time = all_delivery_times[order_no]
         print(f"{order_no} is delivered within {delivery_time} mins")
 
+def _replay_timeline(timeline, travel_matrix, location_mapping):
+    """
+    Replay one driver's actions in sequence.
+    
+    Returns:
+        Dict[str, int]: order_no -> delivery time for orders this driver delivered
+    """
+    current_location = None
+    current_time = 0
+    carrying_orders = {}  # order_no -> pickup_time
+    delivery_times = {}
+    
+    for action in timeline:
+        location = action['location']
+        action_type = action['action_type']
+        
+        # Calculate travel time if location changed
+        if current_location is not None and current_location != location:
+            from_idx = location_mapping[current_location]
+            to_idx = location_mapping[location]
+            travel_time = travel_matrix[from_idx][to_idx]
+            current_time += travel_time
+        
+        current_location = location
+        
+        if action_type == 'pick_up':
+            order_no = action['order_no']
+            carrying_orders[order_no] = current_time
+            
+        elif action_type == 'drop_off':
+            order_no = action['order_no']
+            if order_no in carrying_orders:
+                pickup_time = carrying_orders[order_no]
+                delivery_time = current_time - pickup_time
+                delivery_times[order_no] = delivery_time
+                del carrying_orders[order_no]
+    
+    return delivery_times
+
+def _chunk_bounds(actions_path, num_chunks):
+    """Split a file into num_chunks byte ranges; each range owns the lines that start inside it."""
+    size = os.path.getsize(actions_path)
+    return [(size * i // num_chunks, size * (i + 1) // num_chunks) for i in range(num_chunks)]
+
+def _spill_path(spill_dir, chunk, shard):
+    return os.path.join(spill_dir, f"chunk{chunk:04d}_shard{shard:04d}.pkl")
+
+def _split_chunk(actions_path, start, end, chunk, num_shards, spill_dir):
+    """
+    Worker entry point for phase 1: parse the lines starting in [start, end) and
+    spill them per driver shard.
+    
+    Each spill file holds columns (byte_offset, driver, location, action_type,
+    order_no) in file order - columns of strings pickle several times faster
+    than action dicts. The offset of a driver's first line is its global
+    first-appearance rank.
+    """
+    shards = [([], [], [], [], []) for _ in range(num_shards)]
+    with open(actions_path, 'rb') as f:
+        offset = start
+        if start > 0:
+            f.seek(start - 1)
+            offset += len(f.readline()) - 1  # skip the line the previous chunk owns
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                action = json.loads(line)
+                driver = action['driver']
+                offsets, drivers, locations, action_types, order_nos = \
+                    shards[zlib.crc32(str(driver).encode()) % num_shards]
+                offsets.append(offset)
+                drivers.append(driver)
+                locations.append(action['location'])
+                action_types.append(action['action_type'])
+                order_nos.append(action.get('order_no'))
+            offset += len(line)
+    for shard, columns in enumerate(shards):
+        with open(_spill_path(spill_dir, chunk, shard), 'wb') as f:
+            pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _replay_shard(shard, num_chunks, spill_dir, travel_matrix, location_mapping):
+    """
+    Worker entry point for phase 2: replay every driver of one shard.
+    
+    Returns:
+        Dict[str, Tuple[int, int]]: order_no -> (driver_rank, delivery time)
+    """
+    driver_timelines = {}  # driver -> (rank, timeline), filled in file order
+    for chunk in range(num_chunks):
+        with open(_spill_path(spill_dir, chunk, shard), 'rb') as f:
+            columns = pickle.load(f)
+        for offset, driver, location, action_type, order_no in zip(*columns):
+            entry = driver_timelines.get(driver)
+            if entry is None:
+                entry = driver_timelines[driver] = (offset, [])
+            entry[1].append({'location': location, 'action_type': action_type, 'order_no': order_no})
+    
+    results = {}
+    for rank, timeline in driver_timelines.values():
+        for order_no, delivery_time in _replay_timeline(timeline, travel_matrix, location_mapping).items():
+            results[order_no] = (rank, delivery_time)
+    return results
+
+def calculate_delivery_times_parallel(actions_path, travel_matrix, location_mapping, num_workers=None):
+    """
+    Replay a JSON-lines action file with drivers partitioned across processes.
+    
+    Two parallel phases, so neither parsing nor replay runs serially in the parent:
+    1. Each worker parses one byte range of the file and spills its actions into
+       per-shard files, sharding drivers by crc32(driver) % num_workers
+    2. Each worker loads the spill files of one shard index and replays those drivers
+    Workers receive paths and indices only; the parent merges the order -> time maps.
+    Output does not depend on worker count.
+    
+    Args:
+        actions_path: str - path to a JSON-lines file of driver action records
+        travel_matrix: List[List[int]] - travel times between locations
+        location_mapping: Dict[str, int] - maps location names to matrix indices
+        num_workers: int - worker processes (defaults to os.cpu_count(); 1 runs inline)
+    
+    Returns:
+        Dict[str, int]: order_no -> delivery time in minutes, in order number sequence
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    bounds = _chunk_bounds(actions_path, num_workers)
+    shards = range(num_workers)
+    
+    with tempfile.TemporaryDirectory(prefix='delivery_replay_') as spill_dir:
+        split_args = ([actions_path] * num_workers, [start for start, _ in bounds], [end for _, end in bounds],
+                      list(shards), [num_workers] * num_workers, [spill_dir] * num_workers)
+        replay_args = (list(shards), [num_workers] * num_workers, [spill_dir] * num_workers,
+                       [travel_matrix] * num_workers, [location_mapping] * num_workers)
+        if num_workers == 1:
+            list(map(_split_chunk, *split_args))
+            shard_results = list(map(_replay_shard, *replay_args))
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                list(executor.map(_split_chunk, *split_args))
+                shard_results = list(executor.map(_replay_shard, *replay_args))
+    
+    # Merge: an order delivered by several drivers keeps the latest-appearing driver's time
+    merged = {}
+    for results in shard_results:
+        for order_no, (rank, delivery_time) in results.items():
+            if order_no not in merged or rank > merged[order_no][0]:
+                merged[order_no] = (rank, delivery_time)
+    
+    return {order_no: merged[order_no][1] for order_no in sorted(merged)}
+
+def encode_actions(actions, location_mapping):
+    """
+    Encode driver action dicts into integer columns for the batch path.
+    
+    Drivers and orders are numbered in order of first appearance, which keeps
+    the batch path's tie-breaking identical to calculate_delivery_times.
+    
+    Args:
+        actions: List[Dict] - driver action records
+        location_mapping: Dict[str, int] - maps location names to matrix indices
+    
+    Returns:
+        Tuple of (driver_idx, location_idx, action_code, order_idx, order_names):
+        four int64 arrays of length len(actions) plus the list of order names
+        indexed by order_idx. Actions without an order_no get order_idx -1.
+    """
+    driver_ids = {}
+    order_ids = {}
+    n = len(actions)
+    driver_idx = np.fromiter(
+        (driver_ids.setdefault(a['driver'], len(driver_ids)) for a in actions),
+        dtype=np.int64, count=n
+    )
+    location_idx = np.fromiter(
+        (location_mapping[a['location']] for a in actions), dtype=np.int64, count=n
+    )
+    action_code = np.fromiter(
+        (ACTION_CODES[a['action_type']] for a in actions), dtype=np.int64, count=n
+    )
+    order_idx = np.fromiter(
+        (order_ids.setdefault(a['order_no'], len(order_ids)) if 'order_no' in a else -1
+         for a in actions),
+        dtype=np.int64, count=n
+    )
+    return driver_idx, location_idx, action_code, order_idx, list(order_ids)
+
+def compute_delivery_times_batch(driver_idx, location_idx, action_code, order_idx, travel_matrix):
+    """
+    Vectorized delivery-time computation over integer-encoded action columns.
+    
+    Args:
+        driver_idx: int array - driver of each action (smaller index = earlier first appearance)
+        location_idx: int array - travel_matrix index of each action's location
+        action_code: int array - PICK_UP, TRAVEL or DROP_OFF
+        order_idx: int array - order of each action, -1 for travel actions
+        travel_matrix: List[List[int]] or 2D array - travel times between locations
+    
+    Returns:
+        Tuple of (orders, delivery_times): int arrays with one entry per delivered
+        order, sorted by order index
+    """
+    driver_idx = np.asarray(driver_idx, dtype=np.int64)
+    location_idx = np.asarray(location_idx, dtype=np.int64)
+    action_code = np.asarray(action_code, dtype=np.int64)
+    order_idx = np.asarray(order_idx, dtype=np.int64)
+    travel_matrix = np.asarray(travel_matrix)
+    
+    if len(driver_idx) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    
+    # Step 1: Make each driver's timeline contiguous, preserving action order
+    by_driver = np.argsort(driver_idx, kind='stable')
+    drivers = driver_idx[by_driver]
+    locations = location_idx[by_driver]
+    
+    # Step 2: Gather every hop's travel time at once
+    is_start = np.empty(len(drivers), dtype=bool)
+    is_start[0] = True
+    is_start[1:] = drivers[1:] != drivers[:-1]
+    prev_locations = np.roll(locations, 1)
+    step = travel_matrix[prev_locations, locations]
+    # Like the replay, staying at the same location costs nothing even if the diagonal is non-zero
+    step[is_start | (prev_locations == locations)] = 0
+    
+    # Step 3: Per-driver clocks = global cumsum minus the cumsum at the driver's first action
+    elapsed = np.cumsum(step)
+    group = np.cumsum(is_start) - 1
+    clock = elapsed - elapsed[np.flatnonzero(is_start)][group]
+    
+    # Step 4: Sort-based join - within (driver, order) a pick-up immediately
+    # followed by a drop-off is a delivery, which mirrors the sequential replay
+    codes = action_code[by_driver]
+    orders = order_idx[by_driver]
+    events = np.flatnonzero((codes != TRAVEL) & (orders >= 0))
+    events = events[np.lexsort((events, orders[events], drivers[events]))]
+    same_key = (drivers[events[1:]] == drivers[events[:-1]]) & (orders[events[1:]] == orders[events[:-1]])
+    matched = same_key & (codes[events[:-1]] == PICK_UP) & (codes[events[1:]] == DROP_OFF)
+    pickups = events[:-1][matched]
+    dropoffs = events[1:][matched]
+    
+    # An order delivered more than once keeps its last delivery, as in the replay
+    matched_orders = orders[dropoffs]
+    times = clock[dropoffs] - clock[pickups]
+    last = np.lexsort((dropoffs, matched_orders))
+    matched_orders = matched_orders[last]
+    times = times[last]
+    keep = np.ones(len(matched_orders), dtype=bool)
+    keep[:-1] = matched_orders[1:] != matched_orders[:-1]
+    return matched_orders[keep], times[keep]
+
+def calculate_delivery_times_vectorized(actions, travel_matrix, location_mapping):
+    """
+    Batch version of calculate_delivery_times for large historical action logs.
+    
+    Args:
+        actions: List[Dict] - driver action records
+        travel_matrix: List[List[int]] - travel times between locations  
+        location_mapping: Dict[str, int] - maps location names to matrix indices
+    
+    Returns:
+        Dict[str, int]: order_no -> delivery time in minutes, in order number sequence
+    """
+    driver_idx, location_idx, action_code, order_idx, order_names = encode_actions(
+        actions, location_mapping
+    )
+    orders, times = compute_delivery_times_batch(
+        driver_idx, location_idx, action_code, order_idx, travel_matrix
+    )
+    delivery_times = {order_names[o]: int(t) for o, t in zip(orders.tolist(), times.tolist())}
+    return {order_no: delivery_times[order_no] for order_no in sorted(delivery_times)}
+
 def test_calculate_delivery_times():
     """Test the delivery time calculation with various scenarios"""
     
@@ -214,6 +486,111 @@ def test_calculate_delivery_times():
     calculate_delivery_times(actions2, travel_matrix1, location_mapping1)
     print()
 
+def test_calculate_delivery_times_vectorized():
+    """Check the batch path against the sequential replay"""
+    import io
+    import random
+    from contextlib import redirect_stdout
+    
+    print("Test Case 3: Vectorized batch path")
+    travel_matrix = [
+        [0, 5, 10, 15],
+        [5, 0, 8, 12],
+        [10, 8, 0, 6],
+        [15, 12, 6, 0]
+    ]
+    location_mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+    actions = [
+        {'location': 'A', 'order_no': 'order_1', 'action_type': 'pick_up', 'driver': 'driver_1'},
+        {'location': 'B', 'action_type': 'travel', 'driver': 'driver_1'},
+        {'location': 'B', 'order_no': 'order_2', 'action_type': 'pick_up', 'driver': 'driver_1'},
+        {'location': 'C', 'action_type': 'travel', 'driver': 'driver_1'},
+        {'location': 'C', 'order_no': 'order_1', 'action_type': 'drop_off', 'driver': 'driver_1'},
+        {'location': 'D', 'action_type': 'travel', 'driver': 'driver_1'},
+        {'location': 'D', 'order_no': 'order_2', 'action_type': 'drop_off', 'driver': 'driver_1'}
+    ]
+    result = calculate_delivery_times_vectorized(actions, travel_matrix, location_mapping)
+    assert result == {'order_1': 13, 'order_2': 14}, result
+    assert calculate_delivery_times_vectorized([], travel_matrix, location_mapping) == {}
+    
+    # Staying put is free even when the matrix has a non-zero diagonal
+    actions = [
+        {'location': 'A', 'order_no': 'order_1', 'action_type': 'pick_up', 'driver': 'driver_1'},
+        {'location': 'A', 'action_type': 'travel', 'driver': 'driver_1'},
+        {'location': 'B', 'order_no': 'order_1', 'action_type': 'drop_off', 'driver': 'driver_1'}
+    ]
+    result = calculate_delivery_times_vectorized(actions, [[4, 5], [5, 4]], {'A': 0, 'B': 1})
+    assert result == {'order_1': 5}, result
+    
+    # Random interleaved drivers, including duplicate and unmatched pick-ups/drop-offs,
+    # with and without a non-zero diagonal
+    rng = random.Random(7)
+    matrices = [travel_matrix, [[row[j] + (3 if i == j else 0) for j in range(4)]
+                                for i, row in enumerate(travel_matrix)]]
+    for trial in range(100):
+        travel_matrix = matrices[trial % 2]
+        actions = []
+        for _ in range(rng.randint(1, 60)):
+            action = {
+                'location': rng.choice('ABCD'),
+                'action_type': rng.choice(['pick_up', 'travel', 'drop_off']),
+                'driver': f"driver_{rng.randint(1, 4)}"
+            }
+            if action['action_type'] != 'travel':
+                action['order_no'] = f"order_{rng.randint(1, 8)}"
+            actions.append(action)
+        
+        expected = io.StringIO()
+        with redirect_stdout(expected):
+            calculate_delivery_times(actions, travel_matrix, location_mapping)
+        result = calculate_delivery_times_vectorized(actions, travel_matrix, location_mapping)
+        printed = "".join(f"{o} is delivered within {t} mins\n" for o, t in result.items())
+        assert printed == expected.getvalue(), (printed, expected.getvalue())
+    
+    print("Vectorized results match the sequential replay")
+    print()
+
+def test_calculate_delivery_times_parallel():
+    """Check the multi-process replay against the batch path for several worker counts"""
+    import random
+    import tempfile
+    
+    print("Test Case 4: Multi-process driver-partitioned replay")
+    travel_matrix = [  # non-zero diagonal: staying put must still cost nothing
+        [2, 5, 10, 15],
+        [5, 2, 8, 12],
+        [10, 8, 2, 6],
+        [15, 12, 6, 2]
+    ]
+    location_mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+    rng = random.Random(11)
+    actions = []
+    for _ in range(2000):
+        action = {
+            'location': rng.choice('ABCD'),
+            'action_type': rng.choice(['pick_up', 'travel', 'drop_off']),
+            'driver': f"driver_{rng.randint(1, 40)}"
+        }
+        if action['action_type'] != 'travel':
+            action['order_no'] = f"order_{rng.randint(1, 300):03d}"
+        actions.append(action)
+    
+    # Byte-range chunks must cover every line exactly once: blank line, no trailing newline
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+        f.write("\n".join(json.dumps(action) for action in actions[:1000]) + "\n\n")
+        f.write("\n".join(json.dumps(action) for action in actions[1000:]))
+    try:
+        expected = calculate_delivery_times_vectorized(actions, travel_matrix, location_mapping)
+        for num_workers in (1, 2, 3, 4, 7):
+            result = calculate_delivery_times_parallel(f.name, travel_matrix, location_mapping, num_workers)
+            assert result == expected, f"Mismatch with {num_workers} workers"
+            assert list(result) == sorted(result)
+    finally:
+        os.remove(f.name)
+    
+    print(f"{len(expected)} orders match across 1, 2, 3, 4 and 7 workers")
+    print()
+
 def algorithm_walkthrough():
     """
     Demonstrates the algorithm step-by-step for interview understanding.
@@ -239,5 +616,7 @@ def algorithm_walkthrough():
 
 if __name__ == "__main__":
     test_calculate_delivery_times()
+    test_calculate_delivery_times_vectorized()
+    test_calculate_delivery_times_parallel()
     print()
     algorithm_walkthrough() 
\ No newline at end of file
@@ -57,8 +57,34 @@ Processing steps:
 4. Print batch 2:
    - "User u004 performed view on p103"
    - "User u005 performed like on p104"
+
+COMPILED FORMATTER (million-record streams):
+format_template.format(**record) re-parses the template and copies the record
+into kwargs for every record, and print() issues one write per line. The
+compiled path parses the template once into literal and field segments, builds
+each batch with a single ''.join and writes it to the output in one call.
+
+FLUSH POLICY:
+process_buffered_stream only flushes on a full buffer or end of input, so on a
+quiet stream records can wait indefinitely. process_buffered_stream_with_policy
+reads from any iterator and flushes on max records, max bytes or max linger
+time, whichever comes first.
+
+ASYNC SINK:
+process_buffered_stream_async hands formatted batches to any object with async
+write/close (file, socket or queue sinks below) through a bounded queue. A slow
+sink fills the queue and pauses formatting instead of buffering without limit.
 """
 
+import asyncio
+import queue
+import sys
+import threading
+import time
+from string import Formatter
+
+_CONVERSIONS = {None: '', 's': '!s', 'r': '!r', 'a': '!a'}
+
 def process_buffered_stream(stream_data, buffer_size, format_template):
     """
     Process a stream of data using a buffer, formatting and printing when buffer is full.
@@ -205,6 +231,419 @@ def _process_buffer_enhanced(buffer, format_template, batch_number,
     
     return stats
 
+# Compiled version for high-volume streams
+class CompiledTemplate:
+    """
+    A format template parsed once into alternating literal and field segments.
+    
+    Plain {field}, {field!r} and {field:spec} placeholders are compiled into a
+    single f-string over the record dict; literals and specs are bound as
+    variables, so only validated identifiers end up in the generated code.
+    Templates using attribute/index lookups, positional or nested fields fall
+    back to format_template.format(**record).
+    """
+    
+    def __init__(self, format_template):
+        self.format_template = format_template
+        self.literals = []   # literals[i] precedes fields[i]; one trailing literal
+        self.fields = []     # (field_name, conversion, format_spec)
+        self.simple = True
+        
+        literal = ''
+        for text, field_name, format_spec, conversion in Formatter().parse(format_template):
+            literal += text
+            if field_name is None:
+                continue
+            if (not field_name.isidentifier() or '{' in format_spec
+                    or conversion not in _CONVERSIONS):
+                self.simple = False
+            self.literals.append(literal)
+            self.fields.append((field_name, conversion, format_spec))
+            literal = ''
+        self.literals.append(literal)
+        
+        if self.simple:
+            self.render, self._render_line = self._compile()
+        else:
+            self.render = self._render_fallback
+            self._render_line = lambda record, i: f"{i}. {self._render_fallback(record)}\n"
+    
+    def _compile(self):
+        """Generate render(record) and render_line(record, i) from the segments."""
+        namespace = {}
+        body = []
+        for k, (field_name, conversion, format_spec) in enumerate(self.fields):
+            namespace[f"L{k}"] = self.literals[k]
+            namespace[f"S{k}"] = format_spec
+            spec = f":{{S{k}}}" if format_spec else ""
+            body.append(f"{{L{k}}}{{record[{field_name!r}]{_CONVERSIONS[conversion]}{spec}}}")
+        namespace["L_END"] = self.literals[-1]
+        body = ''.join(body) + "{L_END}"
+        
+        source = (
+            f'def render(record):\n    return f"{body}"\n'
+            f'def render_line(record, i):\n    return f"{{i}}. {body}\\n"\n'
+        )
+        exec(source, namespace)
+        return namespace["render"], namespace["render_line"]
+    
+    def _render_fallback(self, record):
+        return self.format_template.format(**record)
+    
+    def render_batch(self, buffer, batch_number, skip_errors=False, show_batch_headers=True):
+        """
+        Render a whole batch (header, numbered lines, trailing blank line) as one string.
+        
+        Returns:
+            Tuple[str, Dict]: batch text and {'successful': int, 'errors': int}
+        """
+        header = f"--- Batch {batch_number} ({len(buffer)} records) ---\n" if show_batch_headers else ""
+        footer = "\n" if show_batch_headers else ""
+        render_line = self._render_line
+        
+        # Fast path: no bad records, so the whole batch is one comprehension
+        try:
+            lines = [render_line(record, i) for i, record in enumerate(buffer, 1)]
+            return header + ''.join(lines) + footer, {'successful': len(buffer), 'errors': 0}
+        except Exception:
+            pass
+        
+        stats = {'successful': 0, 'errors': 0}
+        lines = [header]
+        for i, record in enumerate(buffer, 1):
+            line, succeeded = self.render_line_safe(record, i, skip_errors)
+            stats['successful' if succeeded else 'errors'] += 1
+            lines.append(line)
+        lines.append(footer)
+        return ''.join(lines), stats
+    
+    def render_line_safe(self, record, i, skip_errors=False):
+        """
+        Render one numbered output line, turning formatting errors into error lines.
+        
+        Returns:
+            Tuple[str, bool]: the line ('' for a skipped error) and whether it succeeded
+        """
+        try:
+            return self._render_line(record, i), True
+        except KeyError as e:
+            if skip_errors:
+                return '', False
+            return f"{i}. [ERROR] Missing field {e} in record: {record}\n", False
+        except Exception as e:
+            if skip_errors:
+                return '', False
+            return f"{i}. [ERROR] Formatting error: {e}\n", False
+
+def process_buffered_stream_compiled(stream_data, buffer_size, format_template, output=None):
+    """
+    Same output as process_buffered_stream, using a compiled template and one
+    write per batch.
+    
+    Args:
+        stream_data (List[Dict]): List of dictionaries representing stream records
+        buffer_size (int): Maximum number of records to buffer before processing
+        format_template (str): String template for formatting records with {field} placeholders
+        output: Writable text stream (defaults to sys.stdout)
+        
+    Returns:
+        Dict: Statistics about processing (total_records, successful, errors)
+    """
+    output = output if output is not None else sys.stdout
+    stats = {'total_records': 0, 'successful': 0, 'errors': 0}
+    
+    if not stream_data:
+        output.write("No data to process.\n")
+        return stats
+    
+    if buffer_size <= 0:
+        output.write("Buffer size must be positive.\n")
+        return stats
+    
+    template = CompiledTemplate(format_template)
+    stats['total_records'] = len(stream_data)
+    
+    for batch_number, start in enumerate(range(0, len(stream_data), buffer_size), 1):
+        text, batch_stats = template.render_batch(stream_data[start:start + buffer_size], batch_number)
+        output.write(text)
+        stats['successful'] += batch_stats['successful']
+        stats['errors'] += batch_stats['errors']
+    
+    return stats
+
+# Flush-policy version for unbounded, possibly idle iterator sources
+class FlushPolicy:
+    """
+    Decide when a buffer should be flushed: whichever limit is hit first.
+    
+    Args:
+        max_records (int): Flush once this many records are buffered
+        max_bytes (int): Flush once the buffered formatted output reaches this many UTF-8 bytes
+        max_linger_seconds (float): Flush once the oldest buffered record has waited this long
+    
+    Any limit left as None is not enforced; at least one must be set.
+    """
+    
+    def __init__(self, max_records=None, max_bytes=None, max_linger_seconds=None):
+        if max_records is None and max_bytes is None and max_linger_seconds is None:
+            raise ValueError("FlushPolicy needs at least one of max_records, max_bytes, max_linger_seconds")
+        for name, value in (('max_records', max_records), ('max_bytes', max_bytes),
+                            ('max_linger_seconds', max_linger_seconds)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value}")
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_linger_seconds = max_linger_seconds
+    
+    def is_full(self, record_count, byte_count):
+        """Size-based trigger, checked after each record is buffered."""
+        return ((self.max_records is not None and record_count >= self.max_records)
+                or (self.max_bytes is not None and byte_count >= self.max_bytes))
+    
+    def time_until_flush(self, oldest_arrival, now):
+        """Seconds until the linger limit fires (None if no linger limit or empty buffer)."""
+        if self.max_linger_seconds is None or oldest_arrival is None:
+            return None
+        return max(0.0, oldest_arrival + self.max_linger_seconds - now)
+
+_END_OF_STREAM = object()
+_LINGER_EXPIRED = object()
+
+def _close_source(source):
+    close = getattr(source, 'close', None)
+    if close is not None:
+        close()
+
+def _read_into_queue(source, records, error, stop):
+    """
+    Reader thread: move records from a (possibly blocking) iterator into a queue.
+    
+    Exits without signalling end of stream once stop is set; the consumer drains
+    the queue after setting it, so at most one in-flight put() can still land.
+    """
+    try:
+        for record in source:
+            if stop.is_set():
+                break
+            records.put(record)
+    except Exception as e:
+        error.append(e)
+    finally:
+        if stop.is_set():
+            _close_source(source)
+        else:
+            records.put(_END_OF_STREAM)
+
+def process_buffered_stream_with_policy(source, format_template, flush_policy, output=None,
+                                        skip_errors=False, show_batch_headers=True,
+                                        clock=time.monotonic):
+    """
+    Buffer records from any iterator and flush by size, bytes or linger time.
+    
+    Records are formatted on arrival so the byte limit sees real output size.
+    With a linger limit, a reader thread pulls from the source and the buffer is
+    flushed on time even when the source is idle, so latency (max_linger_seconds)
+    and batch efficiency (max_records / max_bytes) can be tuned independently.
+    If formatting or writing fails, the reader thread is stopped and joined and
+    the source is closed before the error propagates.
+    
+    Args:
+        source (Iterable[Dict]): Records; may be a generator or a blocking iterator
+        format_template (str): String template for formatting records
+        flush_policy (FlushPolicy): When to flush the buffer
+        output: Writable text stream (defaults to sys.stdout); one write per batch
+        skip_errors (bool): Whether to skip records with formatting errors
+        show_batch_headers (bool): Whether to show batch headers
+        clock: Monotonic time function (injectable for tests)
+        
+    Returns:
+        Dict: Statistics about processing (total_records, successful, errors, batches)
+    """
+    output = output if output is not None else sys.stdout
+    template = CompiledTemplate(format_template)
+    stats = {'total_records': 0, 'successful': 0, 'errors': 0, 'batches': 0}
+    
+    def flush(lines, record_count):
+        stats['batches'] += 1
+        if show_batch_headers:
+            header = f"--- Batch {stats['batches']} ({record_count} records) ---\n"
+            output.write(header + ''.join(lines) + "\n")
+        else:
+            output.write(''.join(lines))
+    
+    reader_error = []
+    records = iter(source)
+    reader = None
+    if flush_policy.max_linger_seconds is None:
+        next_record = lambda timeout: next(records, _END_OF_STREAM)
+    else:
+        # Bounded hand-off so a fast source cannot outrun the writer
+        handoff = queue.Queue(maxsize=flush_policy.max_records or 1024)
+        stop_reader = threading.Event()
+        reader = threading.Thread(target=_read_into_queue,
+                                  args=(records, handoff, reader_error, stop_reader), daemon=True)
+        reader.start()
+        
+        def next_record(timeout):
+            try:
+                return handoff.get(timeout=timeout)
+            except queue.Empty:
+                return _LINGER_EXPIRED
+    
+    finished = False
+    try:
+        lines, buffered, byte_count, oldest_arrival = [], 0, 0, None
+        while True:
+            record = next_record(flush_policy.time_until_flush(oldest_arrival, clock()))
+            if record is _END_OF_STREAM:
+                break
+            
+            if record is not _LINGER_EXPIRED:
+                if oldest_arrival is None:
+                    oldest_arrival = clock()
+                buffered += 1
+                stats['total_records'] += 1
+                line, succeeded = template.render_line_safe(record, buffered, skip_errors)
+                stats['successful' if succeeded else 'errors'] += 1
+                if line:
+                    lines.append(line)
+                    byte_count += len(line.encode('utf-8'))
+            
+            if buffered and (flush_policy.is_full(buffered, byte_count)
+                             or flush_policy.time_until_flush(oldest_arrival, clock()) == 0):
+                flush(lines, buffered)
+                lines, buffered, byte_count, oldest_arrival = [], 0, 0, None
+        
+        if buffered:
+            flush(lines, buffered)
+        finished = True
+    finally:
+        if reader is not None:
+            stop_reader.set()
+            while True:  # free queue space so a put() blocked on a full queue returns
+                try:
+                    handoff.get_nowait()
+                except queue.Empty:
+                    break
+            # A reader blocked inside a slow source exits at its next record
+            reader.join(timeout=1.0)
+        elif not finished:
+            _close_source(records)
+    if reader_error:
+        raise reader_error[0]
+    return stats
+
+# Async version with a pluggable sink
+class AsyncFileSink:
+    """Async sink over a text file; blocking writes run in the default executor."""
+    
+    def __init__(self, file):
+        self.file = file
+    
+    async def write(self, text):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.file.write, text)
+    
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.file.flush)
+
+class AsyncStreamSink:
+    """Async sink over an asyncio.StreamWriter (e.g. a socket); drain() applies TCP backpressure."""
+    
+    def __init__(self, writer, encoding='utf-8'):
+        self.writer = writer
+        self.encoding = encoding
+    
+    async def write(self, text):
+        self.writer.write(text.encode(self.encoding))
+        await self.writer.drain()
+    
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+class AsyncQueueSink:
+    """Async sink that hands each batch's text to an asyncio.Queue consumer."""
+    
+    def __init__(self, batch_queue):
+        self.batch_queue = batch_queue
+    
+    async def write(self, text):
+        await self.batch_queue.put(text)
+    
+    async def close(self):
+        pass
+
+async def process_buffered_stream_async(stream_data, buffer_size, format_template, sink,
+                                        skip_errors=True, show_batch_headers=True,
+                                        max_pending_batches=2):
+    """
+    Async counterpart of process_buffered_stream_enhanced that writes to a sink.
+    
+    Full buffers are formatted and put on a bounded queue drained by a writer
+    task, so formatting batch N+1 overlaps with the sink's I/O for batch N.
+    When the sink is slower than formatting, the queue fills and the producer
+    waits, keeping at most max_pending_batches formatted batches in memory.
+    
+    Args:
+        stream_data (List[Dict]): List of dictionaries representing stream records
+        buffer_size (int): Maximum number of records to buffer before processing
+        format_template (str): String template for formatting records
+        sink: Object with async write(text) and async close() methods
+        skip_errors (bool): Whether to skip records with formatting errors
+        show_batch_headers (bool): Whether to show batch headers
+        max_pending_batches (int): Bound on formatted batches waiting for the sink
+        
+    Returns:
+        Dict: Statistics about processing (total_records, successful, errors)
+    """
+    if not stream_data:
+        await sink.write("No data to process.\n")
+        return {'total_records': 0, 'successful': 0, 'errors': 0}
+    
+    if buffer_size <= 0:
+        await sink.write("Buffer size must be positive.\n")
+        return {'total_records': 0, 'successful': 0, 'errors': 0}
+    
+    template = CompiledTemplate(format_template)
+    stats = {'total_records': len(stream_data), 'successful': 0, 'errors': 0}
+    pending = asyncio.Queue(maxsize=max_pending_batches)
+    
+    async def drain_to_sink():
+        while True:
+            text = await pending.get()
+            if text is None:
+                return
+            await sink.write(text)
+    
+    writer = asyncio.create_task(drain_to_sink())
+    
+    async def enqueue(item):
+        # Wait for queue space, but stop early if the writer has failed
+        put = asyncio.ensure_future(pending.put(item))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            writer.result()  # re-raises the sink's error
+    
+    try:
+        for batch_number, start in enumerate(range(0, len(stream_data), buffer_size), 1):
+            text, batch_stats = template.render_batch(
+                stream_data[start:start + buffer_size], batch_number, skip_errors, show_batch_headers
+            )
+            stats['successful'] += batch_stats['successful']
+            stats['errors'] += batch_stats['errors']
+            await enqueue(text)
+        await enqueue(None)
+        await writer
+    finally:
+        if not writer.done():
+            writer.cancel()
+        await sink.close()
+    
+    return stats
+
 # Test cases
 def test_process_buffered_stream():
     # Test case 1: Basic user activity stream
@@ -310,5 +749,185 @@ def test_process_buffered_stream():
     )
     print(f"Processing Statistics: {stats}")
 
+def test_process_buffered_stream_compiled():
+    """Compiled path must produce byte-identical output to process_buffered_stream."""
+    import io
+    from contextlib import redirect_stdout
+    
+    print("Test Case 8: Compiled Formatter")
+    print("=" * 50)
+    cases = [
+        ([{'user_id': 'u001', 'action': 'like', 'post_id': 'p100'},
+          {'user_id': 'u002', 'post_id': 'p101'},
+          {'user_id': 'u003', 'action': 'share', 'post_id': 'p102'}],
+         2, "User {user_id} performed {action} on {post_id}"),
+        ([{'product_name': 'Laptop', 'price': 999.99, 'quantity': 2},
+          {'product_name': 'Mouse', 'price': 25.5, 'quantity': 1}],
+         5, "{quantity:>3}x {product_name!r} for ${price:.2f} {{net}}"),
+        ([{'user': {'name': 'Alice'}}], 1, "Hello {user[name]}"),
+        ([{'name': 'Bob'}], 1, "{}"),
+        ([{'q': 'it\'s "quoted"', 'n': 7}], 2, 'Say {q!r} \\ {n:\'^5} """ done'),
+        ([], 3, "{x}"),
+    ]
+    for stream, buffer_size, template in cases:
+        expected = io.StringIO()
+        with redirect_stdout(expected):
+            process_buffered_stream(stream, buffer_size, template)
+        actual = io.StringIO()
+        process_buffered_stream_compiled(stream, buffer_size, template, output=actual)
+        assert actual.getvalue() == expected.getvalue(), (actual.getvalue(), expected.getvalue())
+    print("Compiled output matches process_buffered_stream for all cases")
+    print()
+
+def test_process_buffered_stream_with_policy():
+    """Size, byte and linger triggers over iterator sources."""
+    import io
+    from contextlib import redirect_stdout
+    
+    print("Test Case 9: Flush Policy over an Iterator Source")
+    print("=" * 50)
+    template = "User {user_id} performed {action} on {post_id}"
+    stream = [{'user_id': f'u{i:03d}', 'action': 'like', 'post_id': f'p{i}'} for i in range(10)]
+    stream[4] = {'user_id': 'u004'}
+    
+    # Record limit over a generator matches the list-based version
+    expected = io.StringIO()
+    with redirect_stdout(expected):
+        process_buffered_stream(stream, 3, template)
+    actual = io.StringIO()
+    stats = process_buffered_stream_with_policy(
+        (record for record in stream), template, FlushPolicy(max_records=3), output=actual
+    )
+    assert actual.getvalue() == expected.getvalue()
+    assert stats == {'total_records': 10, 'successful': 9, 'errors': 1, 'batches': 4}, stats
+    
+    # Byte limit: each line is ~35 bytes, so 80 bytes flushes every 3 records
+    actual = io.StringIO()
+    stats = process_buffered_stream_with_policy(
+        iter(stream), template, FlushPolicy(max_records=100, max_bytes=80),
+        output=actual, show_batch_headers=False
+    )
+    assert stats['batches'] == 4, stats
+    
+    # Linger limit: an idle source still gets its buffered records flushed
+    flushed_at = []
+    
+    class RecordingOutput:
+        def write(self, text):
+            flushed_at.append((time.monotonic(), text))
+    
+    def slow_source():
+        yield stream[0]
+        yield stream[1]
+        time.sleep(0.3)
+        yield stream[2]
+    
+    start = time.monotonic()
+    stats = process_buffered_stream_with_policy(
+        slow_source(), template, FlushPolicy(max_records=100, max_linger_seconds=0.05),
+        output=RecordingOutput()
+    )
+    assert stats['batches'] == 2, stats
+    assert flushed_at[0][0] - start < 0.25, "linger flush should not wait for the next record"
+    assert "(2 records)" in flushed_at[0][1] and "(1 records)" in flushed_at[1][1]
+    
+    # A failing writer stops and joins the reader thread and closes the source
+    class FailingOutput:
+        def write(self, text):
+            raise OSError("sink closed")
+    
+    for policy in (FlushPolicy(max_records=2, max_linger_seconds=5),
+                   FlushPolicy(max_records=2)):
+        closed = []
+        
+        def endless_source():
+            try:
+                while True:
+                    yield stream[0]
+            finally:
+                closed.append(True)
+        
+        threads_before = threading.active_count()
+        try:
+            process_buffered_stream_with_policy(endless_source(), template, policy, output=FailingOutput())
+            assert False, "writer error should propagate"
+        except OSError:
+            pass
+        assert closed == [True], policy.__dict__
+        assert threading.active_count() == threads_before
+    
+    print(f"Record, byte and linger triggers behave as configured: {stats}")
+    print()
+
+def test_process_buffered_stream_async():
+    """Async sink output matches the enhanced version and a stalled sink bounds formatting."""
+    import io
+    from contextlib import redirect_stdout
+    
+    print("Test Case 10: Async Sink with Backpressure")
+    print("=" * 50)
+    template = "User {user_id} performed {action} on {post_id}"
+    stream = [{'user_id': f'u{i:03d}', 'action': 'like', 'post_id': f'p{i}'} for i in range(50)]
+    stream[7] = {'user_id': 'u007'}
+    
+    expected = io.StringIO()
+    with redirect_stdout(expected):
+        expected_stats = process_buffered_stream_enhanced(stream, 4, template, skip_errors=False)
+    
+    batch_queue = asyncio.Queue()
+    
+    async def run_queue_sink():
+        stats = await process_buffered_stream_async(
+            stream, 4, template, AsyncQueueSink(batch_queue), skip_errors=False
+        )
+        chunks = []
+        while not batch_queue.empty():
+            chunks.append(batch_queue.get_nowait())
+        return ''.join(chunks), stats
+    
+    text, stats = asyncio.run(run_queue_sink())
+    assert text == expected.getvalue()
+    assert stats == expected_stats, (stats, expected_stats)
+    
+    # Backpressure: while the sink is stalled only a bounded number of batches get formatted
+    formatted = []
+    
+    class CountingRecord(dict):
+        def __getitem__(self, key):
+            formatted.append(key)
+            return dict.__getitem__(self, key)
+    
+    class StalledSink:
+        def __init__(self):
+            self.release = asyncio.Event()
+        
+        async def write(self, text):
+            await self.release.wait()
+        
+        async def close(self):
+            pass
+    
+    async def run_stalled_sink():
+        sink = StalledSink()
+        big_stream = [CountingRecord(record) for record in stream if len(record) == 3] * 20
+        task = asyncio.create_task(process_buffered_stream_async(
+            big_stream, 4, template, sink, max_pending_batches=2
+        ))
+        await asyncio.sleep(0.05)
+        records_formatted = len(formatted) // 3
+        sink.release.set()
+        await task
+        return records_formatted
+    
+    records_formatted = asyncio.run(run_stalled_sink())
+    # one batch in the sink, two queued, one waiting to be queued
+    assert records_formatted <= 4 * 4, records_formatted
+    print(f"Async output matches enhanced version: {stats}")
+    print(f"Stalled sink held formatting to {records_formatted} of {49 * 20} records")
+    print()
+
 if __name__ == "__main__":
-    test_process_buffered_stream() 
\ No newline at end of file
+    test_process_buffered_stream()
+    test_process_buffered_stream_compiled()
+    test_process_buffered_stream_with_policy()
+    test_process_buffered_stream_async()
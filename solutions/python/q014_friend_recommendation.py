@@ -10,8 +10,36 @@ This solution demonstrates:
 3. Efficient set operations for finding mutual connections
 4. Robust tie-breaking and sorting
 5. Edge case handling for invalid inputs and empty results
+
+Scaling note: generate_recommendations scans every user per call, so one
+recommendation costs O(|users| x friends). FriendGraphIndex is built once
+(id -> row map plus CSR adjacency arrays) and takes candidates from a two-hop
+expansion of the target's friends, plus small pools for zero-mutual candidates,
+so per-user latency depends on local degree rather than total population.
+
+Scoring reads from UserAttributeColumns (interned country codes, activity and
+privacy bitmasks) rather than user dicts, so the rules run over candidate arrays.
+
+RecommendationCache serves cached top-K lists and, when a friendship is added or
+removed, updates mutual counts only for the affected two-hop neighbourhood.
+
+For very high-degree users, MinHashFriendSketches estimates mutual counts from
+a bottom-k sketch of the target's friend_ids (optional approximate mode; run
+this file with --benchmark to compare recall@K and latency with the exact path).
+
+For the nightly all-users precompute, iter_recommendations_bulk computes mutual
+counts as the sparse product A . A^T restricted to non-edges, one block of
+rows at a time, and scores and ranks each block with array operations.
 """
 
+import heapq
+import itertools
+import math
+import sys
+from collections import Counter
+
+import numpy as np
+
 def get_user_by_id(user_id, users_data):
     """Helper to find a user dict by user_id."""
     for user in users_data:
@@ -87,6 +115,625 @@ def generate_recommendations(target_user_id: int, users_data: list[dict], max_re
     return [user_id for user_id, score in sorted_recommendations[:max_recommendations]]
 
 
+def _is_active(user):
+    """Activity bonus rule: active in the last 7 days."""
+    return user.get('last_active_days_ago', float('inf')) <= 7
+
+
+class UserAttributeColumns:
+    """
+    Columnar copy of the scoring attributes, one entry per user row.
+    
+    - country: interned country_code per row (uint8/uint16 code into country_names)
+    - active_bits: packed bitmask, bit set if last_active_days_ago <= 7
+    - private_bits: packed bitmask, bit set if is_private
+    
+    score() evaluates the scoring rules over whole candidate arrays, so no user
+    dict is touched after the columns are built.
+    """
+    
+    def __init__(self, users):
+        country_codes = {}
+        codes = [country_codes.setdefault(user.get('country_code'), len(country_codes))
+                 for user in users]
+        self.country_names = list(country_codes)
+        num_countries = len(self.country_names)
+        dtype = np.uint8 if num_countries <= 256 else np.uint16 if num_countries <= 65536 else np.int32
+        self.country = np.array(codes, dtype=dtype)
+        self.active_bits = np.packbits(
+            np.fromiter((_is_active(user) for user in users), dtype=bool, count=len(users)),
+            bitorder='little'
+        )
+        self.private_bits = np.packbits(
+            np.fromiter((user.get('is_private', False) for user in users), dtype=bool, count=len(users)),
+            bitorder='little'
+        )
+    
+    def __len__(self):
+        return len(self.country)
+    
+    @staticmethod
+    def _test_bits(bits, rows):
+        rows = np.asarray(rows)
+        return ((bits[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1).astype(bool)
+    
+    def is_active(self, rows):
+        return self._test_bits(self.active_bits, rows)
+    
+    def is_private(self, rows):
+        return self._test_bits(self.private_bits, rows)
+    
+    def score(self, target_rows, candidate_rows, mutual_counts):
+        """
+        Scoring kernel over arrays (target_rows may be a scalar or broadcast):
+        +5 per mutual friend, +3 same country, +2 active in last 7 days,
+        -10 private with no mutual friends.
+        
+        A candidate is recommendable iff its score is > 0 (private candidates
+        with mutual friends always score >= 5).
+        """
+        candidate_rows = np.asarray(candidate_rows)
+        mutual_counts = np.asarray(mutual_counts, dtype=np.int64)
+        return (mutual_counts * 5
+                + 3 * (self.country[candidate_rows] == self.country[target_rows])
+                + 2 * self.is_active(candidate_rows)
+                - 10 * (self.is_private(candidate_rows) & (mutual_counts == 0)))
+
+
+class FriendGraphIndex:
+    """
+    Graph index over users_data, built once and reused for every recommendation.
+    
+    - row_of: user_id -> row (O(1) replacement for get_user_by_id's linear scan)
+    - friends_indptr/friends_indices: CSR adjacency, row -> rows in its friend_ids
+    - listed_by_indptr/listed_by_indices: reverse CSR, row -> rows whose friend_ids
+      contain it. friend_ids need not be symmetric, so candidates sharing a friend f
+      with the target are exactly the rows listed_by(f).
+    - attributes: UserAttributeColumns used for all scoring
+    - cold pools: public users grouped by country code and activity, sorted by
+      user_id, for candidates with zero mutual friends (country/activity bonus only)
+    
+    Friend ids that are not users in users_data still get a row (with no user
+    attributes), since they count towards mutual friends in the original scoring.
+    """
+    
+    def __init__(self, users_data):
+        self.row_of = {}
+        self.user_ids = []
+        self.users = []
+        for user in users_data:
+            if user['user_id'] not in self.row_of:
+                self._add_row(user['user_id'], user)
+        num_users = len(self.users)
+        
+        friend_rows = []
+        for row in range(num_users):
+            friend_ids = dict.fromkeys(self.users[row].get('friend_ids', []))
+            friend_rows.append([self._row_for_friend(friend_id) for friend_id in friend_ids])
+        
+        num_rows = len(self.user_ids)
+        self.friends_indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        self.friends_indptr[1:num_users + 1] = np.cumsum([len(rows) for rows in friend_rows])
+        self.friends_indptr[num_users + 1:] = self.friends_indptr[num_users]
+        self.friends_indices = np.fromiter(
+            (r for rows in friend_rows for r in rows), dtype=np.int64,
+            count=int(self.friends_indptr[-1])
+        )
+        
+        # Reverse adjacency: stable sort of (friend row -> listing row) edges
+        sources = np.repeat(np.arange(num_rows, dtype=np.int64), np.diff(self.friends_indptr))
+        order = np.argsort(self.friends_indices, kind='stable')
+        self.listed_by_indices = sources[order]
+        self.listed_by_indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        self.listed_by_indptr[1:] = np.cumsum(np.bincount(self.friends_indices, minlength=num_rows))
+        
+        self.attributes = UserAttributeColumns(self.users)
+        
+        # Zero-mutual candidates can only score via country (+3) and activity (+2),
+        # and private ones never score above 0, so only public users are pooled
+        self.active_by_country = {}
+        self.inactive_by_country = {}
+        rows = np.arange(num_users)
+        public_rows = rows[~self.attributes.is_private(rows)]
+        public_active = self.attributes.is_active(public_rows)
+        for row, country, active in zip(public_rows.tolist(),
+                                        self.attributes.country[public_rows].tolist(),
+                                        public_active.tolist()):
+            pools = self.active_by_country if active else self.inactive_by_country
+            pools.setdefault(country, []).append(self.user_ids[row])
+        for pools in (self.active_by_country, self.inactive_by_country):
+            for pool in pools.values():
+                pool.sort()
+    
+    def _add_row(self, user_id, user):
+        self.row_of[user_id] = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.users.append(user)
+        return self.row_of[user_id]
+    
+    def _row_for_friend(self, friend_id):
+        row = self.row_of.get(friend_id)
+        if row is None:
+            # Referenced only as a friend; placed after all user rows
+            row = len(self.user_ids)
+            self.row_of[friend_id] = row
+            self.user_ids.append(friend_id)
+        return row
+    
+    def get_user(self, user_id):
+        """O(1) lookup of a user dict by user_id (None if not in users_data)."""
+        row = self.row_of.get(user_id)
+        if row is None or row >= len(self.users):
+            return None
+        return self.users[row]
+    
+    def friend_rows(self, row):
+        return self.friends_indices[self.friends_indptr[row]:self.friends_indptr[row + 1]]
+    
+    def listed_by_rows(self, row):
+        return self.listed_by_indices[self.listed_by_indptr[row]:self.listed_by_indptr[row + 1]]
+    
+    def count_mutual_friends(self, target_row):
+        """Two-hop expansion: Counter of candidate row -> mutual friend count."""
+        mutual_counts = Counter()
+        for friend_row in self.friend_rows(target_row).tolist():
+            mutual_counts.update(self.listed_by_rows(friend_row).tolist())
+        return mutual_counts
+    
+    def recommend(self, target_user_id, max_recommendations):
+        """
+        Same results as generate_recommendations, in time proportional to the
+        target's two-hop neighbourhood plus max_recommendations.
+        """
+        target_user = self.get_user(target_user_id)
+        if not target_user or max_recommendations <= 0:
+            return []
+        
+        target_row = self.row_of[target_user_id]
+        excluded = set(self.friend_rows(target_row).tolist())
+        excluded.add(target_row)
+        return self._rank_candidates(
+            target_row, excluded, self.count_mutual_friends(target_row), max_recommendations
+        )
+    
+    def _rank_candidates(self, target_row, excluded, mutual_counts, max_recommendations):
+        """Score mutual-friend and zero-mutual candidates and return the top user_ids."""
+        target_country = int(self.attributes.country[target_row])
+        num_users = len(self.users)
+        
+        # Candidates with mutual friends: always positive (+5 each, no private penalty)
+        candidate_rows = [row for row in mutual_counts if row not in excluded and row < num_users]
+        scores = self.attributes.score(
+            target_row, np.array(candidate_rows, dtype=np.int64),
+            [mutual_counts[row] for row in candidate_rows]
+        )
+        scored = [(-score, self.user_ids[row]) for row, score in zip(candidate_rows, scores.tolist())]
+        
+        # Zero-mutual candidates by descending score: same country and active (5),
+        # same country only (3), active elsewhere (2). Each pool is in user_id order,
+        # so only the first max_recommendations usable ids of each can make the cut.
+        other_countries_active = heapq.merge(*(
+            pool for country, pool in self.active_by_country.items() if country != target_country
+        ))
+        cold_pools = (
+            (5, self.active_by_country.get(target_country, [])),
+            (3, self.inactive_by_country.get(target_country, [])),
+            (2, other_countries_active),
+        )
+        for score, pool in cold_pools:
+            taken = 0
+            for user_id in pool:
+                row = self.row_of[user_id]
+                if row in excluded or row in mutual_counts:
+                    continue
+                scored.append((-score, user_id))
+                taken += 1
+                if taken == max_recommendations:
+                    break
+        
+        scored.sort()
+        return [user_id for _, user_id in scored[:max_recommendations]]
+
+
+class RecommendationCache:
+    """
+    Cached top-K recommendations that stay correct as friendships change.
+    
+    Keeps a mutable copy of the index adjacency, each user's mutual-friend
+    Counter (built on first request) and their cached top-K list. Adding or
+    removing an edge a -> b only changes mutual counts for a (candidates who
+    list b) and for users who list b (candidate a), so only those two-hop
+    neighbours are updated and invalidated. Every other user's cached list is
+    served as is, in O(1).
+    
+    Friendships are symmetric here: add_friendship(u, v) adds v to u's
+    friend_ids and u to v's.
+    """
+    
+    def __init__(self, index, max_recommendations):
+        self.index = index
+        self.max_recommendations = max_recommendations
+        num_rows = len(index.user_ids)
+        self.friends = [set(index.friend_rows(row).tolist()) for row in range(num_rows)]
+        self.listed_by = [set(index.listed_by_rows(row).tolist()) for row in range(num_rows)]
+        self.mutual_counts = {}   # row -> Counter(candidate row -> mutual friends)
+        self.top_k = {}           # row -> cached recommendation list
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, user_id):
+        """Top-K recommendations for user_id, from cache when still valid."""
+        if self.index.get_user(user_id) is None:
+            return []
+        row = self.index.row_of[user_id]
+        cached = self.top_k.get(row)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        
+        self.misses += 1
+        mutual_counts = self.mutual_counts.get(row)
+        if mutual_counts is None:
+            mutual_counts = Counter()
+            for friend_row in self.friends[row]:
+                mutual_counts.update(self.listed_by[friend_row])
+            self.mutual_counts[row] = mutual_counts
+        excluded = self.friends[row] | {row}
+        cached = self.index._rank_candidates(row, excluded, mutual_counts, self.max_recommendations)
+        self.top_k[row] = cached
+        return cached
+    
+    def add_friendship(self, user_id, friend_id):
+        self._update_edge(user_id, friend_id, +1)
+        self._update_edge(friend_id, user_id, +1)
+    
+    def remove_friendship(self, user_id, friend_id):
+        self._update_edge(user_id, friend_id, -1)
+        self._update_edge(friend_id, user_id, -1)
+    
+    def _update_edge(self, user_id, friend_id, delta):
+        """Apply a -> b (delta=+1) or remove it (delta=-1), touching only its two-hop neighbourhood."""
+        a = self.index.row_of[user_id]
+        b = self.index.row_of[friend_id]
+        if (b in self.friends[a]) == (delta > 0):
+            return
+        if delta > 0:
+            self.friends[a].add(b)
+            self.listed_by[b].add(a)
+            listing_b = self.listed_by[b]
+        else:
+            listing_b = set(self.listed_by[b])  # still includes a, like the counts being undone
+            self.friends[a].discard(b)
+            self.listed_by[b].discard(a)
+        
+        # Target a: every user listing b gains/loses b as a mutual friend
+        counts = self.mutual_counts.get(a)
+        if counts is not None:
+            for candidate in listing_b:
+                _bump(counts, candidate, delta)
+        self.top_k.pop(a, None)
+        
+        # Targets listing b: candidate a gains/loses b as a mutual friend
+        for target in listing_b:
+            if target == a:
+                continue
+            counts = self.mutual_counts.get(target)
+            if counts is not None:
+                _bump(counts, a, delta)
+            self.top_k.pop(target, None)
+
+
+def _bump(counts, key, delta):
+    """Counter update that drops keys reaching zero (membership means 'has mutuals')."""
+    value = counts[key] + delta
+    if value:
+        counts[key] = value
+    else:
+        del counts[key]
+
+
+def sketch_size_for_error(max_error):
+    """
+    Bottom-k sketch size whose mutual-friend estimates have additive error at
+    most max_error * degree at ~2 standard deviations (sd <= 1 / (2 * sqrt(k))).
+    """
+    if not 0 < max_error < 1:
+        raise ValueError(f"max_error must be in (0, 1), got {max_error}")
+    return math.ceil(1 / max_error ** 2)
+
+
+def _splitmix64(values, seed):
+    """Vectorized 64-bit hash of integer row ids."""
+    with np.errstate(over='ignore'):
+        z = values.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) & 0xFFFFFFFFFFFFFFFF)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class MinHashFriendSketches:
+    """
+    Approximate recommendations for high-degree users via bottom-k sketches.
+    
+    Each user's sketch is the k friends with the smallest (seeded) hash - a
+    uniform sample of friend_ids. For a target t with sketch S, a candidate c's
+    mutual-friend count is estimated as |S & friends(c)| * |friends(t)| / |S|,
+    found by expanding only the k sketched friends instead of all of them.
+    Users with at most k friends use the exact path (their sketch is complete).
+    
+    Args:
+        index: FriendGraphIndex
+        sketch_size: k; defaults to sketch_size_for_error(max_error), or 128
+        max_error: target additive error as a fraction of the target's degree
+        seed: hash seed
+    """
+    
+    def __init__(self, index, sketch_size=None, max_error=None, seed=0):
+        if sketch_size is None:
+            sketch_size = sketch_size_for_error(max_error) if max_error is not None else 128
+        self.index = index
+        self.sketch_size = sketch_size
+        
+        num_rows = len(index.user_ids)
+        degrees = np.diff(index.friends_indptr)
+        row_hash = _splitmix64(np.arange(num_rows), seed)
+        owners = np.repeat(np.arange(num_rows, dtype=np.int64), degrees)
+        order = np.lexsort((row_hash[index.friends_indices], owners))
+        rank = np.arange(len(order)) - np.repeat(index.friends_indptr[:-1], degrees)
+        keep = rank < sketch_size
+        self.sketch_rows = index.friends_indices[order][keep]
+        self.sketch_indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        self.sketch_indptr[1:] = np.cumsum(np.minimum(degrees, sketch_size))
+        self.degrees = degrees
+    
+    def sketch(self, row):
+        return self.sketch_rows[self.sketch_indptr[row]:self.sketch_indptr[row + 1]]
+    
+    def estimate_mutual_friends(self, target_row):
+        """Counter of candidate row -> estimated mutual friends (rounded, at least 1)."""
+        sample = self.sketch(target_row).tolist()
+        hits = Counter()
+        for friend_row in sample:
+            hits.update(self.index.listed_by_rows(friend_row).tolist())
+        if len(sample) == self.degrees[target_row]:
+            return hits
+        scale = self.degrees[target_row] / len(sample)
+        return Counter({row: max(1, round(count * scale)) for row, count in hits.items()})
+    
+    def recommend(self, target_user_id, max_recommendations):
+        """Approximate FriendGraphIndex.recommend; exact when degree <= sketch_size."""
+        index = self.index
+        if index.get_user(target_user_id) is None or max_recommendations <= 0:
+            return []
+        target_row = index.row_of[target_user_id]
+        if self.degrees[target_row] <= self.sketch_size:
+            return index.recommend(target_user_id, max_recommendations)
+        
+        excluded = set(index.friend_rows(target_row).tolist())
+        excluded.add(target_row)
+        return index._rank_candidates(
+            target_row, excluded, self.estimate_mutual_friends(target_row), max_recommendations
+        )
+
+
+def benchmark_minhash_recommendations(num_users=20000, community_size=500, num_hubs=40,
+                                      hub_degree=3000, sketch_sizes=(64, 128, 256), k=10, seed=1):
+    """
+    Compare MinHashFriendSketches with the exact FriendGraphIndex path on
+    high-degree users (the case the approximate mode is for).
+    
+    Synthetic graph: regular users have ~100 friends, mostly inside their
+    community; hubs befriend most of several communities plus random users.
+    Reports per-user latency, recall@k against the exact top-k, and the
+    mutual-count ratio (exact mutual friends of the approximate picks divided
+    by those of the exact picks; near-tied candidates hurt recall but not this).
+    """
+    import random
+    import time
+    
+    rng = random.Random(seed)
+    num_communities = num_users // community_size
+    friend_ids = []
+    for user_id in range(num_users):
+        community = user_id // community_size * community_size
+        friends = set(rng.sample(range(community, community + community_size), 90))
+        friends.update(rng.sample(range(num_users), 10))
+        friend_ids.append(friends)
+    hubs = rng.sample(range(num_users), num_hubs)
+    for hub in hubs:
+        for community in rng.sample(range(num_communities), 5):
+            start = community * community_size
+            friend_ids[hub].update(rng.sample(range(start, start + community_size), community_size * 3 // 5))
+        friend_ids[hub].update(rng.sample(range(num_users), hub_degree - len(friend_ids[hub])))
+    users = [{
+        'user_id': user_id,
+        'country_code': rng.choice(['US', 'CA', 'GB', 'IN']),
+        'is_private': rng.random() < 0.2,
+        'friend_ids': list(friends - {user_id}),
+        'last_active_days_ago': rng.randint(0, 14)
+    } for user_id, friends in enumerate(friend_ids)]
+    index = FriendGraphIndex(users)
+    
+    start = time.perf_counter()
+    exact = {hub: index.recommend(hub, k) for hub in hubs}
+    exact_ms = (time.perf_counter() - start) * 1000 / num_hubs
+    exact_mutuals = {hub: index.count_mutual_friends(index.row_of[hub]) for hub in hubs}
+    
+    def total_mutuals(hub, recs):
+        return sum(exact_mutuals[hub][index.row_of[user_id]] for user_id in recs)
+    
+    print(f"Benchmark: {num_users} users, {num_hubs} hubs with ~{hub_degree} friends, top-{k}")
+    print(f"  exact        {exact_ms:8.2f} ms/user")
+    for sketch_size in sketch_sizes:
+        sketches = MinHashFriendSketches(index, sketch_size=sketch_size, seed=seed)
+        start = time.perf_counter()
+        approx = {hub: sketches.recommend(hub, k) for hub in hubs}
+        approx_ms = (time.perf_counter() - start) * 1000 / num_hubs
+        recall = sum(len(set(approx[h]) & set(exact[h])) for h in hubs) / sum(len(exact[h]) for h in hubs)
+        ratio = sum(total_mutuals(h, approx[h]) for h in hubs) / sum(total_mutuals(h, exact[h]) for h in hubs)
+        print(f"  bottom-{sketch_size:<4}  {approx_ms:8.2f} ms/user  "
+              f"recall@{k}={recall:.3f}  mutual-count ratio={ratio:.3f}")
+
+
+def _gather_csr(indptr, indices, rows):
+    """Concatenate CSR rows: returns (repeat counts per row, gathered column indices)."""
+    counts = indptr[rows + 1] - indptr[rows]
+    total = int(counts.sum())
+    offsets = np.repeat(indptr[rows] - np.cumsum(counts) + counts, counts)
+    return counts, indices[offsets + np.arange(total, dtype=np.int64)]
+
+
+def _sorted_contains(sorted_keys, keys):
+    """Vectorized membership test of keys in an ascending key array."""
+    if len(sorted_keys) == 0:
+        return np.zeros(np.shape(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+def _cold_candidate_table(index, max_recommendations, slack):
+    """
+    Per country code, the best zero-mutual candidates in rank order, truncated.
+    
+    Returns (rows, scores, complete): rows/scores are (num_countries, width)
+    arrays padded with -1, and complete[k] says the list for country code k was not
+    truncated. A target whose exclusions eat into a truncated list is rescored
+    with FriendGraphIndex.recommend.
+    """
+    width = max_recommendations + slack
+    num_countries = len(index.attributes.country_names)
+    rows = np.full((num_countries, width), -1, dtype=np.int64)
+    scores = np.zeros((num_countries, width), dtype=np.int64)
+    complete = np.ones(num_countries, dtype=bool)
+    
+    for country in range(num_countries):
+        other_countries_active = heapq.merge(*(
+            pool for other, pool in index.active_by_country.items() if other != country
+        ))
+        ranked = itertools.chain(
+            ((5, user_id) for user_id in index.active_by_country.get(country, [])),
+            ((3, user_id) for user_id in index.inactive_by_country.get(country, [])),
+            ((2, user_id) for user_id in other_countries_active),
+        )
+        prefix = list(itertools.islice(ranked, width + 1))
+        if len(prefix) > width:
+            complete[country] = False
+            prefix = prefix[:width]
+        for j, (score, user_id) in enumerate(prefix):
+            rows[country, j] = index.row_of[user_id]
+            scores[country, j] = score
+    return rows, scores, complete
+
+
+def iter_recommendations_bulk(index, max_recommendations, block_size=4096, cold_slack=64):
+    """
+    Batch PYMK for every user, one row block at a time.
+    
+    Mutual-friend counts for a block of targets are the sparse product
+    A[block] . A^T (A = friend adjacency), computed by expanding each target's
+    friends into the reverse CSR and counting duplicate (target, candidate)
+    pairs. Pairs that are already edges are dropped, the country/activity
+    rules are applied over whole arrays, and the top K per row are taken with
+    one lexsort. Memory is bounded by the block's two-hop pair count.
+    
+    Args:
+        index: FriendGraphIndex built over users_data
+        max_recommendations: K, recommendations per user
+        block_size: target rows per block
+        cold_slack: extra zero-mutual candidates kept per country beyond K
+    
+    Yields:
+        Dict[user_id, List[user_id]] for each block, same results as
+        generate_recommendations for every user
+    """
+    num_users = len(index.users)
+    num_rows = len(index.user_ids)
+    if num_users == 0 or max_recommendations <= 0:
+        return
+    
+    attributes = index.attributes
+    user_ids = np.asarray(index.user_ids[:num_users])
+    id_rank = np.empty(num_users, dtype=np.int64)
+    id_rank[np.argsort(user_ids, kind='stable')] = np.arange(num_users)
+    cold_rows, cold_scores, cold_complete = _cold_candidate_table(
+        index, max_recommendations, cold_slack
+    )
+    
+    for lo in range(0, num_users, block_size):
+        targets = np.arange(lo, min(lo + block_size, num_users), dtype=np.int64)
+        
+        # Edges of the block, then two-hop pairs via the reverse CSR
+        friend_counts, edge_friends = _gather_csr(index.friends_indptr, index.friends_indices, targets)
+        edge_targets = np.repeat(targets, friend_counts)
+        edge_keys = np.sort(edge_targets * num_rows + edge_friends)
+        fanout, pair_candidates = _gather_csr(index.listed_by_indptr, index.listed_by_indices, edge_friends)
+        pair_keys = np.repeat(edge_targets, fanout) * num_rows + pair_candidates
+        
+        # Compress duplicate pairs: count = mutual friends
+        pair_keys, mutual = np.unique(pair_keys, return_counts=True)
+        pair_targets, pair_candidates = np.divmod(pair_keys, num_rows)
+        keep = ((pair_candidates != pair_targets) & (pair_candidates < num_users)
+                & ~_sorted_contains(edge_keys, pair_keys))
+        fof_targets = pair_targets[keep]
+        fof_candidates = pair_candidates[keep]
+        fof_scores = attributes.score(fof_targets, fof_candidates, mutual[keep])
+        
+        # Zero-mutual candidates from the per-country table
+        target_country = attributes.country[targets]
+        cold_candidates = cold_rows[target_country]
+        cold_targets = np.broadcast_to(targets[:, None], cold_candidates.shape)
+        cold_keys = cold_targets * num_rows + cold_candidates
+        usable = ((cold_candidates >= 0) & (cold_candidates != cold_targets)
+                  & ~_sorted_contains(edge_keys, cold_keys) & ~_sorted_contains(pair_keys, cold_keys))
+        # Truncated lists with fewer than K usable entries may hide better candidates
+        needs_rescore = ~cold_complete[target_country] & (usable.sum(axis=1) < max_recommendations)
+        
+        all_targets = np.concatenate([fof_targets, cold_targets[usable]])
+        all_candidates = np.concatenate([fof_candidates, cold_candidates[usable]])
+        all_scores = np.concatenate([fof_scores, cold_scores[target_country][usable]])
+        
+        # Top K per target: sort by (target, -score, user_id), keep the first K of each run.
+        # A single packed int64 key sorts much faster than a three-key lexsort.
+        score_span = int(all_scores.max(initial=0)) + 1
+        if len(targets) * score_span * num_users < 2 ** 63:
+            packed = (((all_targets - lo) * score_span + (score_span - 1 - all_scores)) * num_users
+                      + id_rank[all_candidates])
+            order = np.argsort(packed)
+        else:
+            order = np.lexsort((id_rank[all_candidates], -all_scores, all_targets))
+        all_targets = all_targets[order]
+        all_candidates = all_candidates[order]
+        run_starts = np.searchsorted(all_targets, targets)
+        rank = np.arange(len(all_targets)) - np.repeat(run_starts, np.diff(np.append(run_starts, len(all_targets))))
+        top = rank < max_recommendations
+        top_targets = all_targets[top]
+        top_ids = user_ids[all_candidates[top]].tolist()
+        bounds = np.searchsorted(top_targets, np.append(targets, targets[-1] + 1)).tolist()
+        
+        block = {}
+        for i, row in enumerate(targets.tolist()):
+            user_id = index.user_ids[row]
+            if needs_rescore[i]:
+                block[user_id] = index.recommend(user_id, max_recommendations)
+            else:
+                block[user_id] = top_ids[bounds[i]:bounds[i + 1]]
+        yield block
+
+
+def generate_recommendations_bulk(users_data, max_recommendations, block_size=4096):
+    """
+    Nightly precompute: top max_recommendations for every user in users_data.
+    
+    Returns:
+        Dict[user_id, List[user_id]]
+    """
+    index = FriendGraphIndex(users_data)
+    recommendations = {}
+    for block in iter_recommendations_bulk(index, max_recommendations, block_size):
+        recommendations.update(block)
+    return recommendations
+
+
 # Test cases
 def test_generate_recommendations():
     # Test data
@@ -149,8 +796,179 @@ def test_generate_recommendations():
     
     print("All test cases passed!")
 
+def test_user_attribute_columns():
+    """Scoring kernel must match the per-dict scoring rules."""
+    import random
+    
+    rng = random.Random(9)
+    users = []
+    for user_id in range(300):
+        user = {'user_id': user_id}
+        if rng.random() < 0.9:
+            user['country_code'] = rng.choice(['US', 'CA', 'GB', None])
+        if rng.random() < 0.9:
+            user['is_private'] = rng.random() < 0.4
+        if rng.random() < 0.9:
+            user['last_active_days_ago'] = rng.randint(0, 14)
+        users.append(user)
+    columns = UserAttributeColumns(users)
+    assert columns.country.dtype == np.uint8
+    
+    targets = np.array([rng.randrange(300) for _ in range(1000)])
+    candidates = np.array([rng.randrange(300) for _ in range(1000)])
+    mutual = np.array([rng.choice([0, 0, 1, 2, 5]) for _ in range(1000)])
+    scores = columns.score(targets, candidates, mutual).tolist()
+    for t, c, m, score in zip(targets.tolist(), candidates.tolist(), mutual.tolist(), scores):
+        expected = m * 5
+        expected += 3 if users[c].get('country_code') == users[t].get('country_code') else 0
+        expected += 2 if users[c].get('last_active_days_ago', float('inf')) <= 7 else 0
+        expected -= 10 if users[c].get('is_private', False) and m == 0 else 0
+        assert score == expected, (t, c, m, score, expected)
+    
+    print("UserAttributeColumns scoring kernel matches the dict-based rules")
+
+def test_friend_graph_index():
+    """FriendGraphIndex.recommend must agree with the full scan."""
+    import random
+    
+    test_users = [
+        {'user_id': 1, 'country_code': 'US', 'is_private': False, 'friend_ids': [2, 3], 'last_active_days_ago': 0},
+        {'user_id': 2, 'country_code': 'US', 'is_private': False, 'friend_ids': [1, 4], 'last_active_days_ago': 5},
+        {'user_id': 3, 'country_code': 'CA', 'is_private': True,  'friend_ids': [1, 5], 'last_active_days_ago': 10},
+        {'user_id': 4, 'country_code': 'US', 'is_private': False, 'friend_ids': [2], 'last_active_days_ago': 2},
+        {'user_id': 5, 'country_code': 'CA', 'is_private': True,  'friend_ids': [3, 6, 7], 'last_active_days_ago': 3},
+        {'user_id': 9, 'country_code': 'US', 'is_private': False, 'friend_ids': [], 'last_active_days_ago': 1},
+        {'user_id': 10, 'country_code': 'CA', 'is_private': True, 'friend_ids': [2], 'last_active_days_ago': 2}
+    ]
+    index = FriendGraphIndex(test_users)
+    assert index.recommend(1, 3) == [4, 5, 10]
+    assert index.recommend(9, 3) == [1, 2, 4]
+    assert index.recommend(99, 3) == []
+    assert index.get_user(4) is test_users[3]
+    assert index.get_user(6) is None  # only referenced as a friend
+    
+    # Random graphs: asymmetric friend lists, unknown friend ids, missing fields
+    rng = random.Random(3)
+    for _ in range(30):
+        users = []
+        for user_id in rng.sample(range(1, 200), rng.randint(1, 60)):
+            user = {'user_id': user_id, 'friend_ids': rng.sample(range(1, 200), rng.randint(0, 8))}
+            if rng.random() < 0.9:
+                user['country_code'] = rng.choice(['US', 'CA', 'GB', 'IN'])
+            if rng.random() < 0.9:
+                user['is_private'] = rng.random() < 0.3
+            if rng.random() < 0.9:
+                user['last_active_days_ago'] = rng.randint(0, 20)
+            users.append(user)
+        index = FriendGraphIndex(users)
+        for user in users[:10]:
+            for k in (1, 5, 50):
+                expected = generate_recommendations(user['user_id'], users, k)
+                assert index.recommend(user['user_id'], k) == expected
+    
+    print("FriendGraphIndex matches generate_recommendations on fixed and random graphs")
+
+def test_recommendations_bulk():
+    """Bulk precompute must agree with per-user recommendations."""
+    import random
+    
+    rng = random.Random(5)
+    for trial in range(20):
+        users = []
+        for user_id in rng.sample(range(1, 300), rng.randint(1, 120)):
+            user = {'user_id': user_id, 'friend_ids': rng.sample(range(1, 300), rng.randint(0, 10))}
+            if rng.random() < 0.9:
+                user['country_code'] = rng.choice(['US', 'CA', 'GB', 'IN'])
+            if rng.random() < 0.9:
+                user['is_private'] = rng.random() < 0.3
+            if rng.random() < 0.9:
+                user['last_active_days_ago'] = rng.randint(0, 20)
+            users.append(user)
+        index = FriendGraphIndex(users)
+        # Small slack forces some targets onto the rescoring fallback
+        bulk = {}
+        for block in iter_recommendations_bulk(index, 5, block_size=16, cold_slack=trial % 3):
+            bulk.update(block)
+        assert set(bulk) == set(index.user_ids[:len(index.users)])
+        for user_id, recs in bulk.items():
+            assert recs == generate_recommendations(user_id, users, 5), user_id
+    
+    print("Bulk recommendations match generate_recommendations for every user")
+
+def test_recommendation_cache():
+    """Cached results must track a random sequence of friendship edits."""
+    import random
+    
+    rng = random.Random(13)
+    users = []
+    for user_id in range(1, 81):
+        users.append({
+            'user_id': user_id,
+            'country_code': rng.choice(['US', 'CA', 'GB']),
+            'is_private': rng.random() < 0.3,
+            'friend_ids': rng.sample(range(1, 81), rng.randint(0, 6)),
+            'last_active_days_ago': rng.randint(0, 14)
+        })
+    cache = RecommendationCache(FriendGraphIndex(users), max_recommendations=5)
+    by_id = {user['user_id']: user for user in users}
+    
+    for step in range(200):
+        u, v = rng.sample(range(1, 81), 2)
+        if rng.random() < 0.5:
+            cache.add_friendship(u, v)
+            for a, b in ((u, v), (v, u)):
+                if b not in by_id[a]['friend_ids']:
+                    by_id[a]['friend_ids'].append(b)
+        else:
+            cache.remove_friendship(u, v)
+            for a, b in ((u, v), (v, u)):
+                by_id[a]['friend_ids'] = [f for f in by_id[a]['friend_ids'] if f != b]
+        for user_id in rng.sample(range(1, 81), 10):
+            assert cache.get(user_id) == generate_recommendations(user_id, users, 5), (step, user_id)
+    
+    cache.get(1)
+    hits_before = cache.hits
+    cache.get(1)
+    assert cache.hits == hits_before + 1
+    print(f"RecommendationCache stays exact over 200 edits ({cache.hits} hits, {cache.misses} misses)")
+
+def test_minhash_friend_sketches():
+    """Sketches are exact for low degree and close for high degree."""
+    import random
+    
+    assert sketch_size_for_error(0.1) == 100
+    rng = random.Random(17)
+    users = [{'user_id': i, 'country_code': 'US', 'is_private': False,
+              'friend_ids': rng.sample(range(400), 120 if i < 20 else 8),
+              'last_active_days_ago': 1} for i in range(400)]
+    index = FriendGraphIndex(users)
+    sketches = MinHashFriendSketches(index, sketch_size=32)
+    
+    # Low-degree users: complete sketch, identical results
+    for user_id in range(20, 60):
+        assert sketches.recommend(user_id, 5) == index.recommend(user_id, 5)
+    
+    # High-degree users: the sketch is a subset of friend_ids and estimates are unbiased-ish
+    errors = []
+    for row in range(20):
+        assert set(sketches.sketch(row).tolist()) <= set(index.friend_rows(row).tolist())
+        assert len(sketches.sketch(row)) == 32
+        exact = index.count_mutual_friends(row)
+        estimate = sketches.estimate_mutual_friends(row)
+        errors.extend(abs(estimate[c] - exact[c]) / 120 for c in exact if c != row)
+    assert sum(errors) / len(errors) < 0.1, sum(errors) / len(errors)
+    print("MinHashFriendSketches exact at low degree, mean error "
+          f"{sum(errors) / len(errors):.3f} x degree at high degree")
+
 if __name__ == "__main__":
     test_generate_recommendations()
+    test_user_attribute_columns()
+    test_friend_graph_index()
+    test_recommendations_bulk()
+    test_recommendation_cache()
+    test_minhash_friend_sketches()
+    if "--benchmark" in sys.argv:
+        benchmark_minhash_recommendations()
     
     # Example Usage:
     print("\nExample Usage:")
@@ -12,6 +12,15 @@ like Facebook Messenger. Consider metrics such as:
 The function should take a list of user activity logs as input and return
 a summary of these engagement metrics.
 
+For streaming use, MessengerEngagementAggregator keeps the same metrics as
+mergeable state: update() per log, merge() partial aggregates from other
+consumers, snapshot() for the summary. EngagementRollups buckets the same
+state by UTC day and ISO week in one pass (a user bitmap or HyperLogLog per
+bucket), so DAU/WAU and date-range summaries merge buckets instead of
+re-scanning logs. UserActivityStore keeps per-user last-seen, rolling message
+counts and a decayed activity score, indexed for top-K engaged and at-risk
+queries.
+
 DATA STRUCTURE EXAMPLES:
 
 Input: user_activity_logs (List[Dict])
@@ -31,54 +40,377 @@ Output: engagement_summary (Dict)
 }
 """
 
-def analyze_messenger_engagement(user_activity_logs):
+import bisect
+import hashlib
+import heapq
+import math
+from collections import Counter
+from datetime import date, timedelta
+
+
+class HyperLogLog:
     """
-    Analyzes user engagement patterns in a messaging application.
-    (Placeholder implementation)
+    Mergeable distinct-count sketch (2**precision one-byte registers).
+    Standard error is about 1.04 / sqrt(2**precision), ~1.6% at precision 12.
+    Hashing uses blake2b, so sketches built in different processes merge correctly.
     """
-    # Placeholder: Replace with actual logic
-    if not user_activity_logs:
-        return None 
 
-    user_id_set = set()
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item):
+        x = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), 'big')
+        index = x >> (64 - self.precision)
+        remaining = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def __len__(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class UserBitmap:
+    """
+    Distinct users as one bit per dense user index. The user_id -> index map is
+    shared by every bitmap of a rollup, so bitmaps OR together and the set
+    bits count exactly the distinct users.
+    """
+
+    def __init__(self, user_index):
+        self.user_index = user_index
+        self.bits = bytearray()
+
+    def add(self, user_id):
+        bit = self.user_index.setdefault(user_id, len(self.user_index))
+        byte = bit >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (bit & 7)
+
+    def merge(self, other):
+        if other.user_index is not self.user_index:
+            raise ValueError("cannot merge bitmaps built over different user indexes")
+        size = max(len(self.bits), len(other.bits))
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        self.bits = bytearray(merged.to_bytes(size, 'little'))
+        return self
+
+    def __len__(self):
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+
+class MessengerEngagementAggregator:
+    """
+    Incremental, mergeable state behind analyze_messenger_engagement.
+
+    Holds the distinct users (a set, or a HyperLogLog when approximate_users=True),
+    per-chat-type message counters and reaction counts. Each consumer process can
+    update() its own partition and the partial aggregates are combined with merge();
+    snapshot() produces the engagement summary at any time.
+    """
+
+    def __init__(self, approximate_users=False, precision=12, users=None):
+        if users is None:
+            users = HyperLogLog(precision) if approximate_users else set()
+        self.users = users
+        self.messages_by_chat_type = Counter()
+        self.reactions = Counter()
+
+    def update(self, log):
+        user_id = log.get('user_id')
+        if user_id is None:
+            return
+        self.users.add(user_id)
+
+        action = log.get('action')
+        if action == 'send_message' and 'chat_type' in log:
+            self.messages_by_chat_type[log['chat_type']] += 1
+        elif action == 'add_reaction' and log.get('reaction_type') is not None:
+            self.reactions[log['reaction_type']] += 1
+
+    def update_many(self, logs):
+        for log in logs:
+            self.update(log)
+        return self
+
+    def merge(self, other):
+        if isinstance(self.users, set):
+            self.users |= other.users
+        else:
+            self.users.merge(other.users)
+        self.messages_by_chat_type.update(other.messages_by_chat_type)
+        self.reactions.update(other.reactions)
+        return self
+
+    def snapshot(self):
+        total_messages = sum(self.messages_by_chat_type.values())
+        one_to_one = self.messages_by_chat_type['1:1']
+        num_of_users = len(self.users)
+        top_reaction = None
+        if self.reactions:
+            # Most frequent reaction; ties broken by reaction string so merges are order-independent
+            top_reaction = min(self.reactions.items(), key=lambda kv: (-kv[1], kv[0]))[0]
+
+        return {
+            'daily_active_users': num_of_users,
+            'avg_message_per_users': (total_messages / num_of_users) if num_of_users else 0,
+            'chat_type_distribution': {
+                '1:1': (one_to_one / total_messages) if total_messages else 0,
+                'group': ((total_messages - one_to_one) / total_messages) if total_messages else 0,
+            },
+            'top_reaction': top_reaction
+        }
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class EngagementRollups:
+    """
+    Per-day and per-ISO-week engagement, built in a single pass over the logs.
+
+    Every log with a timestamp updates one day bucket and one week bucket (UTC).
+    Each bucket is a MessengerEngagementAggregator whose users are a UserBitmap
+    over a shared user index, or a HyperLogLog when approximate_users=True, so
+    buckets stay compact and any date range is answered by merging day buckets.
+    """
+
+    def __init__(self, approximate_users=False, precision=12):
+        self.approximate_users = approximate_users
+        self.precision = precision
+        self.user_index = {}
+        self.days = {}   # date -> aggregator
+        self.weeks = {}  # (iso_year, iso_week) -> aggregator
+        self._periods = {}  # epoch day number -> (date, iso week), saves a datetime per log
+
+    def _new_aggregator(self):
+        if self.approximate_users:
+            return MessengerEngagementAggregator(users=HyperLogLog(self.precision))
+        return MessengerEngagementAggregator(users=UserBitmap(self.user_index))
+
+    def _period_of(self, timestamp):
+        day_number = int(timestamp) // 86400
+        period = self._periods.get(day_number)
+        if period is None:
+            day = date.fromordinal(_EPOCH_ORDINAL + day_number)
+            # isocalendar()[:2] is (iso_year, iso_week)
+            period = self._periods[day_number] = (day, day.isocalendar()[:2])
+        return period
 
-    total_one_message = 0
-    total_group_message = 0
+    def update(self, log):
+        if log.get('user_id') is None or log.get('timestamp') is None:
+            return
+        day, week = self._period_of(log['timestamp'])
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = self._new_aggregator()
+        bucket.update(log)
+        bucket = self.weeks.get(week)
+        if bucket is None:
+            bucket = self.weeks[week] = self._new_aggregator()
+        bucket.update(log)
 
+    def update_many(self, logs):
+        for log in logs:
+            self.update(log)
+        return self
 
+    def daily(self):
+        """{date: summary} for every day seen; 'active_users' is the DAU."""
+        return {day: _period_summary(self.days[day]) for day in sorted(self.days)}
 
-    for log in user_activity_logs:
-        if not all(i in log for i in ['user_id','action','chat_type']):
-            continue 
-        user_id = log['user_id']
-        action = log['action']
-        chat_type = log['chat_type']
+    def weekly(self):
+        """{(iso_year, iso_week): summary}; 'active_users' is the WAU."""
+        return {week: _period_summary(self.weeks[week]) for week in sorted(self.weeks)}
 
-        user_id_set.add(user_id)
-        
-        if action =='send_message':
-            if chat_type == '1:1':
-                total_one_message+=1
-            else:
-                total_group_message+=1
-    
-    total_messages = total_one_message+total_group_message
+    def range_summary(self, start_date, end_date):
+        """
+        Summary over the inclusive date range [start_date, end_date], merged from
+        day buckets; 'active_users' counts each user once across the range.
+        """
+        merged = self._new_aggregator()
+        day = start_date
+        while day <= end_date:
+            bucket = self.days.get(day)
+            if bucket is not None:
+                merged.merge(bucket)
+            day += timedelta(days=1)
+        return _period_summary(merged)
 
-    one_message_perc = (total_one_message/total_messages) if total_messages else 0 
 
-    group_message_perc = (total_group_message/total_messages) if total_messages else 0
+def _logaddexp(a, b):
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
 
-    num_of_users = len(user_id_set)
 
-    avg_message = (total_messages/num_of_users) if num_of_users else 0 
+class _UserActivity:
+    __slots__ = ('last_seen', 'daily_messages', 'key')
 
-    result = {
-        'daily_active_users':num_of_users,
-        'avg_message_per_users':avg_message,
-        'chat_type_distribution': {'1:1': one_message_perc, 'group': group_message_perc},
-        'top_reaction': None
+    def __init__(self):
+        self.last_seen = None
+        self.daily_messages = []  # sorted [epoch_day, count] pairs inside the rolling window
+        self.key = -math.inf
+
+
+class UserActivityStore:
+    """
+    Per-user activity summary for engagement-tier and churn queries.
+
+    Holds last-seen time, daily message counts for a rolling window and an
+    exponentially decayed activity score (every action adds 1, halving every
+    half_life_days). The score is stored as key = log(sum(exp(rate * t_i))),
+    so score(now) = exp(key - rate * now): decay never changes the order between
+    users, and out-of-order events are just another logaddexp. Keys live in a
+    max-heap (top-K engaged) and a min-heap (at-risk) with lazy deletion, so an
+    update is O(log n) and queries touch only the users they return.
+    """
 
-    }
+    def __init__(self, half_life_days=7.0, window_days=7):
+        self.rate = math.log(2) / (half_life_days * 86400)
+        self.window_days = window_days
+        self.users = {}
+        self.latest_timestamp = None
+        self._engaged_heap = []  # (-key, user_id)
+        self._at_risk_heap = []  # (key, user_id)
+
+    def update(self, log):
+        user_id, timestamp = log.get('user_id'), log.get('timestamp')
+        if user_id is None or timestamp is None:
+            return
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = _UserActivity()
+        if user.last_seen is None or timestamp > user.last_seen:
+            user.last_seen = timestamp
+        if self.latest_timestamp is None or timestamp > self.latest_timestamp:
+            self.latest_timestamp = timestamp
+
+        if log.get('action') == 'send_message':
+            self._count_message(user, int(timestamp) // 86400)
+
+        user.key = _logaddexp(user.key, self.rate * timestamp)
+        heapq.heappush(self._engaged_heap, (-user.key, user_id))
+        heapq.heappush(self._at_risk_heap, (user.key, user_id))
+        if len(self._engaged_heap) > 2 * len(self.users) + 64:
+            self._compact()
+
+    def update_many(self, logs):
+        for log in logs:
+            self.update(log)
+        return self
+
+    def _count_message(self, user, day):
+        days = user.daily_messages
+        position = bisect.bisect_left(days, [day])
+        if position < len(days) and days[position][0] == day:
+            days[position][1] += 1
+        else:
+            days.insert(position, [day, 1])
+        oldest = days[-1][0] - self.window_days + 1
+        if days[0][0] < oldest:
+            del days[:bisect.bisect_left(days, [oldest])]
+
+    def _compact(self):
+        """Drop stale heap entries left behind by lazy deletion."""
+        self._engaged_heap = [(-user.key, user_id) for user_id, user in self.users.items()]
+        self._at_risk_heap = [(user.key, user_id) for user_id, user in self.users.items()]
+        heapq.heapify(self._engaged_heap)
+        heapq.heapify(self._at_risk_heap)
+
+    def _now(self, now):
+        return self.latest_timestamp if now is None else now
+
+    def activity_score(self, user_id, now=None):
+        user = self.users.get(user_id)
+        if user is None:
+            return 0.0
+        return math.exp(user.key - self.rate * self._now(now))
+
+    def rolling_message_count(self, user_id, now=None):
+        """Messages sent in the window_days UTC days ending at now."""
+        user = self.users.get(user_id)
+        if user is None:
+            return 0
+        oldest = int(self._now(now)) // 86400 - self.window_days + 1
+        days = user.daily_messages
+        return sum(count for _, count in days[bisect.bisect_left(days, [oldest]):])
+
+    def user_summary(self, user_id, now=None):
+        if user_id not in self.users:
+            return None
+        return {
+            'last_seen': self.users[user_id].last_seen,
+            'rolling_message_count': self.rolling_message_count(user_id, now),
+            'activity_score': self.activity_score(user_id, now),
+        }
+
+    def _pop_live(self, heap, sign, accept):
+        """Pop live entries in heap order while accept(key) holds; stale entries are discarded."""
+        popped = []
+        while heap:
+            key, user_id = heap[0]
+            if self.users[user_id].key != sign * key:
+                heapq.heappop(heap)
+                continue
+            if not accept(sign * key, len(popped)):
+                break
+            popped.append(heapq.heappop(heap))
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return [(user_id, sign * key) for key, user_id in popped]
+
+    def top_engaged(self, k, now=None):
+        """The k users with the highest decayed activity score, as (user_id, score) pairs."""
+        if not self.users:
+            return []
+        offset = self.rate * self._now(now)
+        entries = self._pop_live(self._engaged_heap, -1, lambda key, taken: taken < k)
+        return [(user_id, math.exp(key - offset)) for user_id, key in entries]
+
+    def at_risk(self, score_threshold, now=None):
+        """
+        Users whose decayed activity score at now is below score_threshold,
+        least active first, as (user_id, score) pairs.
+        """
+        if score_threshold <= 0 or not self.users:
+            return []
+        offset = self.rate * self._now(now)
+        bound = math.log(score_threshold) + offset
+        entries = self._pop_live(self._at_risk_heap, 1, lambda key, taken: key < bound)
+        return [(user_id, math.exp(key - offset)) for user_id, key in entries]
+
+
+def _period_summary(aggregator):
+    summary = aggregator.snapshot()
+    summary['active_users'] = summary.pop('daily_active_users')
+    return summary
+
+
+def analyze_messenger_engagement(user_activity_logs):
+    """
+    Analyzes user engagement patterns in a messaging application.
+    Single pass through MessengerEngagementAggregator.
+    """
+    if not user_activity_logs:
+        return None
+
+    result = MessengerEngagementAggregator().update_many(user_activity_logs).snapshot()
 
     print(result)
     return result
@@ -140,8 +472,9 @@ def test_mixed_messages_and_users():
     # Group messages: 2 (from u1, u3)
     assert summary['chat_type_distribution']['1:1'] == 0.5
     assert summary['chat_type_distribution']['group'] == 0.5
-    # top_reaction is not implemented yet, so it will be None
-    assert summary['top_reaction'] is None 
+    # '❤️' used twice, '👍' once
+    assert summary['top_reaction'] == '❤️'
+
     print("Test case 4 (Mixed Messages, Users, Actions) passed.")
 
 def test_no_messages_sent():
@@ -151,16 +484,110 @@ def test_no_messages_sent():
     ]
     summary = analyze_messenger_engagement(logs)
     assert summary['daily_active_users'] == 2
-    # Current code will error here due to division by zero for avg_message_per_users and chat_type_distribution
-    # Asserting expected behavior if handled:
     assert summary['avg_message_per_users'] == 0
     assert summary['chat_type_distribution']['1:1'] == 0
     assert summary['chat_type_distribution']['group'] == 0
-    print("Test case 5 (No Messages Sent) passed - requires handling for 0 messages.")
+    assert summary['top_reaction'] == '❤️'
+    print("Test case 5 (No Messages Sent) passed.")
+
+def test_aggregator_merge():
+    logs = [
+        {'user_id': 'u1', 'timestamp': 1678886400, 'action': 'send_message', 'chat_id': 'c1', 'chat_type': '1:1'},
+        {'user_id': 'u2', 'timestamp': 1678886460, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+        {'user_id': 'u1', 'timestamp': 1678886520, 'action': 'add_reaction', 'message_id': 'm1', 'reaction_type': '😂'},
+        {'user_id': 'u3', 'timestamp': 1678886580, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+        {'user_id': 'u2', 'timestamp': 1678886600, 'action': 'add_reaction', 'message_id': 'm2', 'reaction_type': '😂'},
+    ]
+    # Two "consumer" partitions merged == one pass over everything
+    left = MessengerEngagementAggregator().update_many(logs[:2])
+    right = MessengerEngagementAggregator().update_many(logs[2:])
+    assert left.merge(right).snapshot() == MessengerEngagementAggregator().update_many(logs).snapshot()
+
+    # HyperLogLog mode: approximate distinct users, mergeable across partitions
+    parts = [MessengerEngagementAggregator(approximate_users=True) for _ in range(4)]
+    for i in range(20000):
+        parts[i % 4].update({'user_id': f'user_{i % 10000}', 'action': 'open_app'})
+    merged = parts[0].merge(parts[1]).merge(parts[2]).merge(parts[3])
+    assert abs(merged.snapshot()['daily_active_users'] - 10000) < 500
+    print("Test case 6 (Aggregator merge, exact and HyperLogLog) passed.")
+
+def test_engagement_rollups():
+    day = 86400
+    monday = 1678665600  # 2023-03-13 00:00 UTC, ISO week 2023-W11
+    logs = [
+        {'user_id': 'u1', 'timestamp': monday, 'action': 'send_message', 'chat_id': 'c1', 'chat_type': '1:1'},
+        {'user_id': 'u2', 'timestamp': monday + 60, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+        {'user_id': 'u1', 'timestamp': monday + day, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+        {'user_id': 'u3', 'timestamp': monday + day + 5, 'action': 'add_reaction', 'message_id': 'm1', 'reaction_type': '👍'},
+        {'user_id': 'u4', 'timestamp': monday + 7 * day, 'action': 'send_message', 'chat_id': 'c2', 'chat_type': '1:1'},
+        {'user_id': 'u1', 'timestamp': monday + 8 * day, 'action': 'send_message', 'chat_id': 'c2', 'chat_type': '1:1'},
+    ]
+    rollups = EngagementRollups().update_many(logs)
+
+    daily = rollups.daily()
+    assert [summary['active_users'] for summary in daily.values()] == [2, 2, 1, 1]
+    assert daily[date(2023, 3, 14)]['avg_message_per_users'] == 0.5
+    assert daily[date(2023, 3, 14)]['top_reaction'] == '👍'
+
+    weekly = rollups.weekly()
+    assert list(weekly) == [(2023, 11), (2023, 12)]
+    assert weekly[(2023, 11)]['active_users'] == 3
+    assert weekly[(2023, 11)]['chat_type_distribution'] == {'1:1': 1 / 3, 'group': 2 / 3}
+    assert weekly[(2023, 12)]['active_users'] == 2
+
+    # Range queries merge day buckets; u1 is counted once across both weeks
+    everything = rollups.range_summary(date(2023, 3, 13), date(2023, 3, 21))
+    assert everything == _period_summary(MessengerEngagementAggregator().update_many(logs))
+    assert rollups.range_summary(date(2023, 3, 14), date(2023, 3, 20))['active_users'] == 3
+    assert rollups.range_summary(date(2023, 1, 1), date(2023, 1, 31))['active_users'] == 0
+
+    approximate = EngagementRollups(approximate_users=True).update_many(logs)
+    assert approximate.weekly()[(2023, 11)]['active_users'] == 3
+    print("Test case 7 (Day and ISO-week rollups) passed.")
+
+def test_user_activity_store():
+    day = 86400
+    start = 1678665600
+    logs = [
+        {'user_id': 'u1', 'timestamp': start, 'action': 'send_message', 'chat_type': '1:1'},
+        {'user_id': 'u2', 'timestamp': start, 'action': 'add_reaction', 'reaction_type': '👍'},
+        {'user_id': 'u1', 'timestamp': start + 7 * day, 'action': 'send_message', 'chat_type': 'group'},
+        {'user_id': 'u3', 'timestamp': start + 13 * day, 'action': 'send_message', 'chat_type': 'group'},
+        {'user_id': 'u1', 'timestamp': start + 14 * day, 'action': 'send_message', 'chat_type': '1:1'},
+        {'user_id': 'u1', 'timestamp': start + 14 * day, 'action': 'send_message', 'chat_type': '1:1'},
+    ]
+    store = UserActivityStore(half_life_days=7, window_days=7).update_many(logs)
+    now = start + 14 * day
+
+    # u1: events at -14d, -7d and two now -> 0.25 + 0.5 + 2; u2: one event 14 days ago
+    assert abs(store.activity_score('u1') - 2.75) < 1e-9
+    assert abs(store.activity_score('u2', now) - 0.25) < 1e-9
+    assert store.user_summary('u1') == {
+        'last_seen': now, 'rolling_message_count': 2, 'activity_score': store.activity_score('u1')}
+    assert store.rolling_message_count('u1', now + 7 * day) == 0
+    assert store.user_summary('nobody') is None
+
+    assert [user_id for user_id, _ in store.top_engaged(2)] == ['u1', 'u3']
+    assert [user_id for user_id, _ in store.at_risk(0.5)] == ['u2']
+    # A week later everyone has decayed; ordering is unchanged and u3 drops below the bar
+    assert [user_id for user_id, _ in store.at_risk(0.5, now + 7 * day)] == ['u2', 'u3']
+
+    # Lazy-deletion heaps agree with a full scan after many updates
+    for i in range(3000):
+        store.update({'user_id': f'u{i % 50}', 'timestamp': start + (i * 997) % (20 * day), 'action': 'open_app'})
+    now = store.latest_timestamp
+    by_score = sorted(store.users, key=lambda user_id: -store.activity_score(user_id, now))
+    assert [user_id for user_id, _ in store.top_engaged(10)] == by_score[:10]
+    threshold = store.activity_score(by_score[25], now)
+    assert {user_id for user_id, _ in store.at_risk(threshold)} == set(by_score[26:])
+    print("Test case 8 (User activity store, top engaged and at-risk) passed.")
 
 if __name__ == "__main__":
     test_analyze_messenger_engagement()
     # test_empty_log()
     test_group_messages_only()
     test_mixed_messages_and_users()
-    test_no_messages_sent() 
\ No newline at end of file
+    test_no_messages_sent()
+    test_aggregator_merge()
+    test_engagement_rollups()
+    test_user_activity_store()
\ No newline at end of file
@@ -35,31 +35,241 @@ Output: success_metrics (Dict)
 }
 """
 
-def measure_quick_access_success(quick_access_logs, user_file_interaction_logs):
+from collections import deque
+
+DEFAULT_JOIN_WINDOW_SECONDS = 600
+
+
+class InteractionWindowIndex:
+    """
+    Hash index of file opens keyed by (user_id, file_id), holding only opens
+    inside the current join window.
+
+    Interactions are added in timestamp order and evicted once they fall
+    before the earliest impression that could still match them, so memory is
+    bounded by the number of opens within one window, not by the log size.
+    An open can be claimed by one impression, after which it no longer
+    matches others.
+    """
+
+    def __init__(self):
+        self.opens = {}         # (user_id, file_id) -> deque of [timestamp, claimed], ascending
+        self.arrivals = deque()  # (timestamp, key) in insertion order, for eviction
+
+    def add(self, interaction):
+        if interaction.get('action') != 'open':
+            return
+        key = (interaction['user_id'], interaction['file_id'])
+        timestamp = interaction['timestamp']
+        timestamps = self.opens.get(key)
+        if timestamps is None:
+            timestamps = self.opens[key] = deque()
+        timestamps.append([timestamp, False])
+        self.arrivals.append((timestamp, key))
+
+    def evict_before(self, cutoff):
+        arrivals = self.arrivals
+        while arrivals and arrivals[0][0] < cutoff:
+            _, key = arrivals.popleft()
+            timestamps = self.opens[key]
+            timestamps.popleft()
+            if not timestamps:
+                del self.opens[key]
+
+    def first_open(self, user_id, file_id, end):
+        """Earliest indexed open of file_id by user_id at or before end, else None."""
+        timestamps = self.opens.get((user_id, file_id))
+        if timestamps and timestamps[0][0] <= end:
+            return timestamps[0][0]
+        return None
+
+    def claim_open(self, user_id, file_id, end):
+        """Claim the earliest unclaimed open of file_id by user_id at or before end; its timestamp, else None."""
+        for entry in self.opens.get((user_id, file_id), ()):
+            if entry[0] > end:
+                break
+            if not entry[1]:
+                entry[1] = True
+                return entry[0]
+        return None
+
+    def __len__(self):
+        return len(self.arrivals)
+
+
+def measure_quick_access_success(quick_access_logs, user_file_interaction_logs,
+                                 join_window_seconds=DEFAULT_JOIN_WINDOW_SECONDS):
     """
     Measures the success of an ML-powered Quick Access feature.
-    (Placeholder implementation)
+
+    Streaming hash join: both inputs are iterated once and must be ordered by
+    timestamp. Opens from user_file_interaction_logs are indexed by
+    (user_id, file_id) and kept only while they can match an impression, i.e.
+    within [impression timestamp, impression timestamp + join_window_seconds].
+    Every quick_access_logs impression is probed against that index and all
+    metrics are accumulated in the same pass. Each open is credited to at most
+    one impression (the earliest one that claims it).
+
+    Args:
+        quick_access_logs: Iterable of impression dicts (suggestions_shown,
+            clicked_suggestion, optional time_to_click_ms / opened_file_manually)
+        user_file_interaction_logs: Iterable of interaction dicts (user_id, timestamp, file_id, action)
+        join_window_seconds: How long after an impression an open still counts towards it
+
+    Returns:
+        Dict with click_through_rate, top_1_accuracy (top suggestion clicked, per
+        impression), avg_time_saved_per_click_ms and adoption_rate, plus
+        manual_top_1_rate (no click, but the top suggestion was opened manually
+        within the window), suggestion_hit_rate (any suggested file clicked or
+        opened) and the impression/click counts they are based on
     """
-    # Placeholder: Replace with actual logic
-    print(f"Measuring Quick Access success from {len(quick_access_logs)} QA logs and {len(user_file_interaction_logs)} interaction logs.")
+    index = InteractionWindowIndex()
+    interactions = iter(user_file_interaction_logs)
+    pending = next(interactions, None)
+
+    active_users = set()
+    adopters = set()
+    impressions = clicks = top_1_correct = manual_top_1 = suggestion_hits = 0
+    click_ms_total = click_ms_count = 0
+    manual_ms_total = manual_ms_count = 0
+
+    for log in quick_access_logs:
+        user_id, shown_at = log['user_id'], log['timestamp']
+        window_end = shown_at + join_window_seconds
+        while pending is not None and pending['timestamp'] <= window_end:
+            active_users.add(pending['user_id'])
+            index.add(pending)
+            pending = next(interactions, None)
+        index.evict_before(shown_at)
+
+        impressions += 1
+        active_users.add(user_id)
+        suggestions = log.get('suggestions_shown') or []
+        clicked = log.get('clicked_suggestion')
+
+        if clicked is not None:
+            clicks += 1
+            adopters.add(user_id)
+            # Claim the click's open even with a logged latency so no other impression counts it
+            opened_at = index.claim_open(user_id, clicked, window_end)
+            time_to_click_ms = log.get('time_to_click_ms')
+            if time_to_click_ms is None and opened_at is not None:
+                time_to_click_ms = (opened_at - shown_at) * 1000
+            if time_to_click_ms is not None:
+                click_ms_total += time_to_click_ms
+                click_ms_count += 1
+            top_1_correct += bool(suggestions) and clicked == suggestions[0]
+            hit = clicked in suggestions
+        else:
+            # No click: the prediction was still right if the user opened a suggested file manually
+            opened_top_1 = bool(suggestions) and index.claim_open(user_id, suggestions[0], window_end) is not None
+            manual_top_1 += opened_top_1
+            hit = opened_top_1 or any(
+                index.claim_open(user_id, file_id, window_end) is not None for file_id in suggestions[1:]
+            )
+            manual_file = log.get('opened_file_manually')
+            if manual_file is not None:
+                opened_at = index.first_open(user_id, manual_file, window_end)
+                if opened_at is not None:
+                    manual_ms_total += (opened_at - shown_at) * 1000
+                    manual_ms_count += 1
+
+        suggestion_hits += hit
+
+    # Interactions after the last impression still make users active
+    while pending is not None:
+        active_users.add(pending['user_id'])
+        pending = next(interactions, None)
+
+    avg_time_saved_per_click_ms = 0
+    if click_ms_count and manual_ms_count:
+        avg_time_saved_per_click_ms = manual_ms_total / manual_ms_count - click_ms_total / click_ms_count
+
     return {
-        'click_through_rate': 0.0,
-        'top_1_accuracy': 0.0,
-        'avg_time_saved_per_click_ms': 0,
-        'adoption_rate': 0.0
+        'click_through_rate': (clicks / impressions) if impressions else 0.0,
+        'top_1_accuracy': (top_1_correct / impressions) if impressions else 0.0,
+        'manual_top_1_rate': (manual_top_1 / impressions) if impressions else 0.0,
+        'suggestion_hit_rate': (suggestion_hits / impressions) if impressions else 0.0,
+        'avg_time_saved_per_click_ms': avg_time_saved_per_click_ms,
+        'adoption_rate': (len(adopters) / len(active_users)) if active_users else 0.0,
+        'impressions': impressions,
+        'clicks': clicks,
     }
 
-# Example Test Cases (Conceptual)
-# def test_measure_quick_access_success():
-#     qa_logs = [
-#         {'user_id': 'u1', 'timestamp': 1678886400, 'suggestions_shown': ['f1.doc', 'f2.pdf'], 'clicked_suggestion': 'f2.pdf'}
-#     ]
-#     interaction_logs = [
-#        {'user_id': 'u1', 'timestamp': 1678886405, 'file_id': 'f2.pdf', 'action': 'open', 'source': 'quick_access'}
-#     ]
-#     metrics = measure_quick_access_success(qa_logs, interaction_logs)
-#     assert metrics is not None # Replace with actual assertions
-#     print("Test for measure_quick_access_success passed (conceptual).")
-
-# if __name__ == "__main__":
-#     test_measure_quick_access_success() 
\ No newline at end of file
+
+# Example Test Cases
+def test_measure_quick_access_success():
+    qa_logs = [
+        {'user_id': 'u1', 'timestamp': 1678886400, 'suggestions_shown': ['f1.doc', 'f2.pdf'], 'clicked_suggestion': 'f2.pdf'}
+    ]
+    interaction_logs = [
+       {'user_id': 'u1', 'timestamp': 1678886405, 'file_id': 'f2.pdf', 'action': 'open', 'source': 'quick_access'}
+    ]
+    metrics = measure_quick_access_success(qa_logs, interaction_logs)
+    assert metrics['click_through_rate'] == 1.0
+    assert metrics['top_1_accuracy'] == 0.0
+    assert metrics['suggestion_hit_rate'] == 1.0
+    assert metrics['adoption_rate'] == 1.0
+    print("Test case 1 (Single click) passed.")
+
+def test_join_metrics():
+    base = 1678886400
+    qa_logs = [
+        # Clicked the top suggestion
+        {'user_id': 'u1', 'timestamp': base, 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': 'a', 'time_to_click_ms': 1000},
+        # Ignored the suggestions but opened the top one manually 20s later
+        {'user_id': 'u2', 'timestamp': base + 10, 'suggestions_shown': ['c', 'd'], 'clicked_suggestion': None,
+         'opened_file_manually': 'c'},
+        # Click without time_to_click_ms: latency comes from the joined open
+        {'user_id': 'u1', 'timestamp': base + 100, 'suggestions_shown': ['e', 'f'], 'clicked_suggestion': 'f'},
+        # Manual open after the join window does not count
+        {'user_id': 'u3', 'timestamp': base + 200, 'suggestions_shown': ['g'], 'clicked_suggestion': None,
+         'opened_file_manually': 'g'},
+    ]
+    interaction_logs = [
+        {'user_id': 'u1', 'timestamp': base + 1, 'file_id': 'a', 'action': 'open', 'source': 'quick_access'},
+        {'user_id': 'u2', 'timestamp': base + 30, 'file_id': 'c', 'action': 'open', 'source': 'manual_navigation'},
+        {'user_id': 'u1', 'timestamp': base + 103, 'file_id': 'f', 'action': 'open', 'source': 'quick_access'},
+        {'user_id': 'u3', 'timestamp': base + 900, 'file_id': 'g', 'action': 'open', 'source': 'manual_navigation'},
+        {'user_id': 'u4', 'timestamp': base + 950, 'file_id': 'h', 'action': 'edit', 'source': 'manual_navigation'},
+    ]
+    metrics = measure_quick_access_success(iter(qa_logs), iter(interaction_logs), join_window_seconds=600)
+    assert metrics['impressions'] == 4 and metrics['clicks'] == 2
+    assert metrics['click_through_rate'] == 0.5
+    assert metrics['top_1_accuracy'] == 0.25         # u1 clicked 'a'
+    assert metrics['manual_top_1_rate'] == 0.25      # u2 opened 'c' manually
+    assert metrics['suggestion_hit_rate'] == 0.75
+    # Manual baseline 20000ms vs clicks (1000 + 3000) / 2
+    assert metrics['avg_time_saved_per_click_ms'] == 18000
+    assert metrics['adoption_rate'] == 1 / 4          # u1 of u1..u4
+    print("Test case 2 (Join-based metrics) passed.")
+
+def test_index_is_bounded_by_window():
+    base = 1678886400
+    qa_logs = ({'user_id': f'u{i % 10}', 'timestamp': base + i * 60, 'suggestions_shown': ['f0'],
+                'clicked_suggestion': None} for i in range(10000))
+    interaction_logs = ({'user_id': f'u{i % 10}', 'timestamp': base + i * 6, 'file_id': f'f{i % 3}', 'action': 'open'}
+                        for i in range(100000))
+
+    peak = 0
+    original_evict = InteractionWindowIndex.evict_before
+
+    def tracking_evict(self, cutoff):
+        nonlocal peak
+        peak = max(peak, len(self))
+        original_evict(self, cutoff)
+
+    InteractionWindowIndex.evict_before = tracking_evict
+    try:
+        metrics = measure_quick_access_success(qa_logs, interaction_logs, join_window_seconds=600)
+    finally:
+        InteractionWindowIndex.evict_before = original_evict
+    # One open every 6s, so the window holds ~600/6 opens plus one impression gap
+    assert peak <= 600 // 6 + 60 // 6 + 1
+    assert metrics['impressions'] == 10000
+    print("Test case 3 (Index memory bounded by join window) passed.")
+
+if __name__ == "__main__":
+    test_measure_quick_access_success()
+    test_join_metrics()
+    test_index_is_bounded_by_window()
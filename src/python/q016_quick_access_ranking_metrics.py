@@ -0,0 +1,297 @@
+"""
+Question 4.4.1 (follow-up): Offline Ranking Quality for Quick Access
+
+CTR only says whether users clicked. To compare quick-access models offline we
+also need ranking metrics over the suggestion lists:
+- hit@k: the file the user actually opened is among the first k suggestions
+- MRR: mean reciprocal rank of the opened file (0 when it was not suggested)
+- NDCG@k: with one relevant file per impression, 1 / log2(rank + 1) when it is
+  ranked within the first k, else 0
+
+Each metric is reported overall, per user and per cohort, with bootstrap
+confidence intervals.
+
+ENCODING:
+suggestions_shown lists and the opened file (clicked_suggestion, falling back to
+opened_file_manually) are interned to int32 codes once. Suggestions become an
+(n_impressions, max_shown) matrix padded with -1, so every metric is a handful
+of NumPy operations over millions of impressions.
+
+BOOTSTRAP:
+Resamples are drawn in batches as an index matrix and turned into per-impression
+draw counts with a single bincount, so a whole batch of resampled means is one
+(batch, n) @ (n, n_metrics) matrix product instead of a gather of every metric.
+
+DATA STRUCTURE EXAMPLES:
+
+Input: quick_access_logs (List[Dict]), as in q016_cloud_storage_quick_access
+- Example: [
+    {'user_id': 'u1', 'timestamp': 1678886400, 'suggestions_shown': ['f1.doc', 'f2.pdf', 'f3.jpg'], 'clicked_suggestion': 'f2.pdf'},
+    {'user_id': 'u1', 'timestamp': 1678886500, 'suggestions_shown': ['f4.ppt', 'f5.txt'], 'clicked_suggestion': None, 'opened_file_manually': 'f6.xls'}
+]
+
+Output: ranking_metrics(...) (Dict)
+- Example: {'hit@1': 0.0, 'hit@3': 0.5, 'mrr': 0.25, 'ndcg@3': 0.315, 'impressions': 2}
+"""
+
+import numpy as np
+
+DEFAULT_KS = (1, 3, 5)
+BOOTSTRAP_ELEMENT_BUDGET = 1 << 24  # resample draws per batch
+
+
+class EncodedImpressions:
+    """
+    Integer-encoded impressions.
+
+    Attributes:
+        suggestions: int32 (n, max_shown) file codes in display order, -1 padded
+        targets: int32 (n,) code of the file actually opened, -1 if none
+        users: int32 (n,) user codes
+        file_ids / user_ids: code -> original id
+    """
+
+    def __init__(self, suggestions, targets, users, file_ids, user_ids):
+        self.suggestions = suggestions
+        self.targets = targets
+        self.users = users
+        self.file_ids = file_ids
+        self.user_ids = user_ids
+
+    def __len__(self):
+        return len(self.targets)
+
+
+def encode_impressions(quick_access_logs, drop_unlabeled=True):
+    """
+    Interns files and users to dense codes and builds the impression arrays.
+
+    Args:
+        quick_access_logs: Iterable of quick access impression dicts
+        drop_unlabeled: Skip impressions where no file was opened (nothing to rank against)
+
+    Returns:
+        EncodedImpressions
+    """
+    file_codes, user_codes = {}, {}
+    rows, targets, users = [], [], []
+    max_shown = 0
+
+    for log in quick_access_logs:
+        opened = log.get('clicked_suggestion')
+        if opened is None:
+            opened = log.get('opened_file_manually')
+        if opened is None and drop_unlabeled:
+            continue
+        shown = log.get('suggestions_shown') or []
+        rows.append([file_codes.setdefault(file_id, len(file_codes)) for file_id in shown])
+        targets.append(-1 if opened is None else file_codes.setdefault(opened, len(file_codes)))
+        users.append(user_codes.setdefault(log['user_id'], len(user_codes)))
+        max_shown = max(max_shown, len(shown))
+
+    suggestions = np.full((len(rows), max_shown), -1, dtype=np.int32)
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    if max_shown:
+        mask = np.arange(max_shown) < lengths[:, None]
+        suggestions[mask] = np.fromiter((code for row in rows for code in row), dtype=np.int32,
+                                        count=int(lengths.sum()))
+
+    return EncodedImpressions(
+        suggestions,
+        np.asarray(targets, dtype=np.int32),
+        np.asarray(users, dtype=np.int32),
+        list(file_codes),
+        list(user_codes),
+    )
+
+
+def target_ranks(encoded):
+    """
+    1-based rank of the opened file in each suggestion list, 0 when it was not shown.
+    """
+    n, max_shown = encoded.suggestions.shape
+    if max_shown == 0:
+        return np.zeros(n, dtype=np.int32)
+    matches = (encoded.suggestions == encoded.targets[:, None]) & (encoded.targets[:, None] >= 0)
+    found = matches.any(axis=1)
+    return np.where(found, matches.argmax(axis=1) + 1, 0).astype(np.int32)
+
+
+def per_impression_metrics(encoded, ks=DEFAULT_KS):
+    """
+    Per-impression metric columns.
+
+    Returns:
+        (names, values) where values is a float64 (n, len(names)) matrix whose
+        column means are the overall metrics
+    """
+    ranks = target_ranks(encoded)
+    found = ranks > 0
+    # log2(rank + 1) for found ranks; 1.0 elsewhere just avoids dividing by zero
+    discount = np.log2(np.where(found, ranks, 1) + 1.0)
+
+    names, columns = [], []
+    for k in ks:
+        names.append(f'hit@{k}')
+        columns.append(found & (ranks <= k))
+    names.append('mrr')
+    columns.append(np.where(found, 1.0 / np.maximum(ranks, 1), 0.0))
+    for k in ks:
+        names.append(f'ndcg@{k}')
+        columns.append(np.where(found & (ranks <= k), 1.0 / discount, 0.0))
+
+    values = np.empty((len(encoded), len(names)), dtype=np.float64)
+    for j, column in enumerate(columns):
+        values[:, j] = column
+    return names, values
+
+
+def ranking_metrics(encoded, ks=DEFAULT_KS):
+    """
+    Overall hit@k, MRR and NDCG@k.
+
+    Returns:
+        Dict of metric name -> mean over impressions, plus 'impressions'
+    """
+    names, values = per_impression_metrics(encoded, ks)
+    means = values.mean(axis=0) if len(values) else np.zeros(len(names))
+    result = {name: float(mean) for name, mean in zip(names, means)}
+    result['impressions'] = len(encoded)
+    return result
+
+
+def _grouped_means(names, values, group_codes, labels):
+    """Per-group metric means with one bincount per metric column."""
+    counts = np.bincount(group_codes, minlength=len(labels))
+    sums = [np.bincount(group_codes, weights=values[:, j], minlength=len(labels)) for j in range(len(names))]
+    breakdown = {}
+    for code in np.flatnonzero(counts):
+        row = {name: float(column[code] / counts[code]) for name, column in zip(names, sums)}
+        row['impressions'] = int(counts[code])
+        breakdown[labels[code]] = row
+    return breakdown
+
+
+def per_user_metrics(encoded, ks=DEFAULT_KS):
+    """
+    Returns:
+        {user_id: metrics dict} for every user with at least one impression
+    """
+    names, values = per_impression_metrics(encoded, ks)
+    return _grouped_means(names, values, encoded.users, encoded.user_ids)
+
+
+def per_cohort_metrics(encoded, user_cohorts, ks=DEFAULT_KS, default_cohort='unknown'):
+    """
+    Args:
+        encoded: EncodedImpressions
+        user_cohorts: Dict user_id -> cohort label (e.g. signup week, platform)
+        default_cohort: Label for users missing from user_cohorts
+
+    Returns:
+        {cohort: metrics dict}
+    """
+    cohort_codes = {}
+    user_to_cohort = np.array(
+        [cohort_codes.setdefault(user_cohorts.get(user_id, default_cohort), len(cohort_codes))
+         for user_id in encoded.user_ids],
+        dtype=np.int64,
+    )
+    names, values = per_impression_metrics(encoded, ks)
+    groups = user_to_cohort[encoded.users] if len(encoded) else np.zeros(0, dtype=np.int64)
+    return _grouped_means(names, values, groups, list(cohort_codes))
+
+
+def bootstrap_confidence_intervals(encoded, ks=DEFAULT_KS, n_resamples=1000, confidence=0.95, seed=0,
+                                   element_budget=BOOTSTRAP_ELEMENT_BUDGET):
+    """
+    Percentile bootstrap intervals for every metric, resampling impressions with replacement.
+
+    Each batch draws a (batch, n) index matrix, bincounts it into draw counts
+    per impression and multiplies the counts by the per-impression metric
+    matrix; batch * n is kept under element_budget.
+
+    Returns:
+        {metric: (low, high)}
+    """
+    names, values = per_impression_metrics(encoded, ks)
+    n = len(values)
+    if n == 0:
+        return {name: (0.0, 0.0) for name in names}
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(n_resamples, element_budget // n))
+    means = np.empty((n_resamples, len(names)), dtype=np.float64)
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        sample = rng.integers(0, n, size=(size, n))
+        sample += np.arange(size)[:, None] * n  # row offsets: one bincount covers the whole batch
+        counts = np.bincount(sample.ravel(), minlength=size * n).reshape(size, n)
+        means[start:start + size] = (counts @ values) / n
+
+    tail = (1.0 - confidence) / 2
+    low, high = np.quantile(means, [tail, 1.0 - tail], axis=0)
+    return {name: (float(lo), float(hi)) for name, lo, hi in zip(names, low, high)}
+
+
+# Example Test Cases
+def test_ranking_metrics():
+    logs = [
+        {'user_id': 'u1', 'suggestions_shown': ['f1', 'f2', 'f3'], 'clicked_suggestion': 'f1'},
+        {'user_id': 'u1', 'suggestions_shown': ['f1', 'f2', 'f3'], 'clicked_suggestion': 'f3'},
+        {'user_id': 'u2', 'suggestions_shown': ['f4', 'f5'], 'clicked_suggestion': None, 'opened_file_manually': 'f6'},
+        {'user_id': 'u2', 'suggestions_shown': ['f4', 'f5'], 'clicked_suggestion': None},  # unlabeled, dropped
+    ]
+    encoded = encode_impressions(logs)
+    assert len(encoded) == 3
+    assert target_ranks(encoded).tolist() == [1, 3, 0]
+
+    metrics = ranking_metrics(encoded, ks=(1, 3))
+    assert metrics['hit@1'] == 1 / 3
+    assert metrics['hit@3'] == 2 / 3
+    assert abs(metrics['mrr'] - (1 + 1 / 3) / 3) < 1e-12
+    assert abs(metrics['ndcg@3'] - (1 + 0.5) / 3) < 1e-12  # 1/log2(4) == 0.5
+    assert metrics['ndcg@1'] == 1 / 3
+    print("Test case 1 (hit@k, MRR, NDCG) passed.")
+
+def test_breakdowns():
+    logs = [
+        {'user_id': 'u1', 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': 'a'},
+        {'user_id': 'u2', 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': 'b'},
+        {'user_id': 'u2', 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': None, 'opened_file_manually': 'c'},
+        {'user_id': 'u3', 'suggestions_shown': ['c'], 'clicked_suggestion': 'c'},
+    ]
+    encoded = encode_impressions(logs)
+    users = per_user_metrics(encoded, ks=(1,))
+    assert users['u1']['hit@1'] == 1.0 and users['u1']['impressions'] == 1
+    assert users['u2']['mrr'] == 0.25 and users['u2']['impressions'] == 2
+
+    cohorts = per_cohort_metrics(encoded, {'u1': 'new', 'u2': 'new'}, ks=(1,))
+    assert cohorts['new']['impressions'] == 3
+    assert cohorts['new']['hit@1'] == 1 / 3
+    assert cohorts['unknown']['hit@1'] == 1.0
+    print("Test case 2 (Per-user and per-cohort breakdowns) passed.")
+
+def test_bootstrap_confidence_intervals():
+    rng = np.random.default_rng(1)
+    logs = []
+    for i in range(5000):
+        shown = [f'f{j}' for j in rng.permutation(10)[:5]]
+        clicked = shown[rng.integers(0, 5)] if rng.random() < 0.6 else None
+        logs.append({'user_id': f'u{i % 200}', 'suggestions_shown': shown, 'clicked_suggestion': clicked,
+                     'opened_file_manually': None if clicked else 'f_other'})
+    encoded = encode_impressions(logs)
+    metrics = ranking_metrics(encoded)
+    # Small element budget forces many batches; results must not depend on batching
+    narrow = bootstrap_confidence_intervals(encoded, n_resamples=200, element_budget=5000 * 3)
+    wide = bootstrap_confidence_intervals(encoded, n_resamples=200)
+    for name, (low, high) in narrow.items():
+        assert low <= metrics[name] <= high, name
+        assert high - low < 0.05, name
+        assert np.allclose(wide[name], (low, high)), name
+    print("Test case 3 (Batched bootstrap confidence intervals) passed.")
+
+if __name__ == "__main__":
+    test_ranking_metrics()
+    test_breakdowns()
+    test_bootstrap_confidence_intervals()
@@ -0,0 +1,128 @@
+"""
+Test file for the messenger engagement challenge in q015_messenger_engagement.py
+"""
+
+import unittest
+import sys
+import os
+from datetime import date, datetime, timezone
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from python.q015_messenger_engagement import (
+    EngagementRollups,
+    HyperLogLog,
+    MessengerEngagementAggregator,
+    UserActivityStore,
+    analyze_messenger_engagement,
+)
+
+LOGS = [
+    {'user_id': 'u1', 'timestamp': 1678886400, 'action': 'send_message', 'chat_id': 'c1', 'chat_type': '1:1'},
+    {'user_id': 'u1', 'timestamp': 1678886402, 'action': 'add_reaction', 'message_id': 'm1', 'reaction_type': '❤️'},
+    {'user_id': 'u2', 'timestamp': 1678886460, 'action': 'send_message', 'chat_id': 'c1', 'chat_type': '1:1'},
+    {'user_id': 'u1', 'timestamp': 1678886520, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+    {'user_id': 'u3', 'timestamp': 1678886580, 'action': 'send_message', 'chat_id': 'g1', 'chat_type': 'group'},
+    {'user_id': 'u3', 'timestamp': 1678886582, 'action': 'add_reaction', 'message_id': 'm2', 'reaction_type': '👍'},
+    {'user_id': 'u3', 'timestamp': 1678886585, 'action': 'add_reaction', 'message_id': 'm3', 'reaction_type': '❤️'},
+]
+
+
+class TestMessengerEngagementAggregator(unittest.TestCase):
+
+    def test_snapshot_matches_function(self):
+        """Aggregator snapshot is the summary analyze_messenger_engagement returns."""
+        aggregator = MessengerEngagementAggregator().update_many(LOGS)
+        self.assertEqual(aggregator.snapshot(), analyze_messenger_engagement(LOGS))
+        self.assertEqual(aggregator.snapshot()['top_reaction'], '❤️')
+
+    def test_merge_partitions(self):
+        """Merging per-partition aggregates equals a single pass, in any order."""
+        full = MessengerEngagementAggregator().update_many(LOGS).snapshot()
+        for split in range(len(LOGS) + 1):
+            left = MessengerEngagementAggregator().update_many(LOGS[:split])
+            right = MessengerEngagementAggregator().update_many(LOGS[split:])
+            self.assertEqual(right.merge(left).snapshot(), full)
+
+    def test_reaction_tie_is_deterministic(self):
+        """Tied reactions resolve the same way regardless of arrival order."""
+        logs = [
+            {'user_id': 'u1', 'action': 'add_reaction', 'reaction_type': '👍'},
+            {'user_id': 'u2', 'action': 'add_reaction', 'reaction_type': '😂'},
+        ]
+        forward = MessengerEngagementAggregator().update_many(logs).snapshot()
+        backward = MessengerEngagementAggregator().update_many(reversed(logs)).snapshot()
+        self.assertEqual(forward['top_reaction'], backward['top_reaction'])
+
+    def test_hyperloglog_accuracy(self):
+        """HyperLogLog estimate is within a few standard errors and merges like a union."""
+        left, right = HyperLogLog(12), HyperLogLog(12)
+        for i in range(30000):
+            left.add(f'user_{i}')
+        for i in range(20000, 50000):
+            right.add(f'user_{i}')
+        self.assertLess(abs(len(left) - 30000) / 30000, 0.05)
+        self.assertLess(abs(len(left.merge(right)) - 50000) / 50000, 0.05)
+        self.assertEqual(len(HyperLogLog(12)), 0)
+
+    def test_hyperloglog_precision_mismatch(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestEngagementRollups(unittest.TestCase):
+
+    def test_rollups_match_direct_aggregation(self):
+        """Every day, week and range summary equals aggregating that slice of raw logs."""
+        start = 1672531200  # 2023-01-01 00:00 UTC
+        logs = [
+            {'user_id': f'u{(i * 7) % 23}', 'timestamp': start + i * 5000,
+             'action': 'send_message', 'chat_type': '1:1' if i % 3 else 'group'}
+            for i in range(600)
+        ]
+        rollups = EngagementRollups().update_many(logs)
+
+        def direct(predicate):
+            summary = MessengerEngagementAggregator().update_many(
+                log for log in logs
+                if predicate(datetime.fromtimestamp(log['timestamp'], timezone.utc).toordinal())
+            ).snapshot()
+            summary['active_users'] = summary.pop('daily_active_users')
+            return summary
+
+        for day, summary in rollups.daily().items():
+            self.assertEqual(summary, direct(lambda ordinal: ordinal == day.toordinal()))
+        for (iso_year, iso_week), summary in rollups.weekly().items():
+            self.assertEqual(summary, direct(
+                lambda ordinal: date.fromordinal(ordinal).isocalendar()[:2] == (iso_year, iso_week)))
+
+        lo, hi = date(2023, 1, 5), date(2023, 1, 20)
+        self.assertEqual(rollups.range_summary(lo, hi),
+                         direct(lambda ordinal: lo.toordinal() <= ordinal <= hi.toordinal()))
+
+
+class TestUserActivityStore(unittest.TestCase):
+
+    def test_out_of_order_events(self):
+        """Scores and rolling counts do not depend on arrival order."""
+        start = 1678665600
+        logs = [{'user_id': f'u{i % 5}', 'timestamp': start + (i * 7919) % (30 * 86400),
+                 'action': 'send_message' if i % 2 else 'open_app'} for i in range(200)]
+        forward = UserActivityStore().update_many(logs)
+        backward = UserActivityStore().update_many(reversed(logs))
+        for user_id in forward.users:
+            self.assertEqual(forward.user_summary(user_id)['last_seen'], backward.user_summary(user_id)['last_seen'])
+            self.assertEqual(forward.rolling_message_count(user_id), backward.rolling_message_count(user_id))
+            self.assertAlmostEqual(forward.activity_score(user_id), backward.activity_score(user_id))
+        self.assertEqual([u for u, _ in forward.top_engaged(3)], [u for u, _ in backward.top_engaged(3)])
+
+    def test_empty_store(self):
+        store = UserActivityStore()
+        self.assertEqual(store.top_engaged(5), [])
+        self.assertEqual(store.at_risk(1.0), [])
+        self.assertEqual(store.activity_score('u1'), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
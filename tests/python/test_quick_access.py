@@ -0,0 +1,147 @@
+"""
+Test file for the quick access success metrics in q016_cloud_storage_quick_access.py
+"""
+
+import unittest
+import sys
+import os
+import math
+import random
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from python.q016_cloud_storage_quick_access import measure_quick_access_success
+from python.q016_quick_access_ranking_metrics import (
+    encode_impressions,
+    per_user_metrics,
+    ranking_metrics,
+)
+
+BASE = 1678886400
+
+
+class TestMeasureQuickAccessSuccess(unittest.TestCase):
+
+    def test_empty_logs(self):
+        metrics = measure_quick_access_success([], [])
+        self.assertEqual(metrics['click_through_rate'], 0.0)
+        self.assertEqual(metrics['top_1_accuracy'], 0.0)
+        self.assertEqual(metrics['avg_time_saved_per_click_ms'], 0)
+        self.assertEqual(metrics['adoption_rate'], 0.0)
+
+    def test_join_window_boundaries(self):
+        """Opens count from the impression timestamp through impression + window, inclusive."""
+        qa_logs = [
+            {'user_id': 'u1', 'timestamp': BASE + 100, 'suggestions_shown': ['a'], 'clicked_suggestion': None},
+            {'user_id': 'u2', 'timestamp': BASE + 100, 'suggestions_shown': ['b'], 'clicked_suggestion': None},
+            {'user_id': 'u3', 'timestamp': BASE + 100, 'suggestions_shown': ['c'], 'clicked_suggestion': None},
+        ]
+        interaction_logs = [
+            {'user_id': 'u1', 'timestamp': BASE + 99, 'file_id': 'a', 'action': 'open'},   # before impression
+            {'user_id': 'u2', 'timestamp': BASE + 160, 'file_id': 'b', 'action': 'open'},  # at window end
+            {'user_id': 'u3', 'timestamp': BASE + 161, 'file_id': 'c', 'action': 'open'},  # after window end
+        ]
+        metrics = measure_quick_access_success(qa_logs, interaction_logs, join_window_seconds=60)
+        self.assertEqual(metrics['top_1_accuracy'], 0.0)
+        self.assertAlmostEqual(metrics['manual_top_1_rate'], 1 / 3)
+
+    def test_open_credited_once(self):
+        """A manual open inside several impressions' windows counts for the first of them only."""
+        qa_logs = [
+            {'user_id': 'u1', 'timestamp': BASE, 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': None},
+            {'user_id': 'u1', 'timestamp': BASE + 10, 'suggestions_shown': ['a', 'b'], 'clicked_suggestion': None},
+            {'user_id': 'u1', 'timestamp': BASE + 20, 'suggestions_shown': ['b', 'a'], 'clicked_suggestion': None},
+        ]
+        interaction_logs = [{'user_id': 'u1', 'timestamp': BASE + 30, 'file_id': 'a', 'action': 'open'}]
+        metrics = measure_quick_access_success(qa_logs, interaction_logs, join_window_seconds=60)
+        self.assertAlmostEqual(metrics['manual_top_1_rate'], 1 / 3)
+        self.assertAlmostEqual(metrics['suggestion_hit_rate'], 1 / 3)
+        self.assertEqual(metrics['top_1_accuracy'], 0.0)
+
+    def test_matches_nested_loop_join(self):
+        """Streaming join agrees with a brute-force join on a random, sorted workload."""
+        rng = random.Random(7)
+        files = [f'f{i}' for i in range(6)]
+        qa_logs, interaction_logs = [], []
+        for i in range(400):
+            user_id = f'u{rng.randrange(8)}'
+            shown = rng.sample(files, 3)
+            clicked = rng.choice(shown + [None, None])
+            qa_logs.append({'user_id': user_id, 'timestamp': BASE + i * 20, 'suggestions_shown': shown,
+                            'clicked_suggestion': clicked})
+        for i in range(1200):
+            interaction_logs.append({'user_id': f'u{rng.randrange(8)}', 'timestamp': BASE + i * 7,
+                                     'file_id': rng.choice(files), 'action': 'open'})
+
+        window = 120
+        claimed = set()
+
+        def claim(log, file_id):
+            for i, it in enumerate(interaction_logs):
+                if (i not in claimed and it['user_id'] == log['user_id'] and it['file_id'] == file_id
+                        and log['timestamp'] <= it['timestamp'] <= log['timestamp'] + window):
+                    claimed.add(i)
+                    return True
+            return False
+
+        top_1 = manual_top_1 = hits = 0
+        for log in qa_logs:
+            target, shown = log['clicked_suggestion'], log['suggestions_shown']
+            if target is not None:
+                claim(log, target)
+                top_1 += target == shown[0]
+                hits += target in shown
+            else:
+                opened_top_1 = claim(log, shown[0])
+                manual_top_1 += opened_top_1
+                hits += opened_top_1 or any(claim(log, file_id) for file_id in shown[1:])
+        metrics = measure_quick_access_success(iter(qa_logs), iter(interaction_logs), join_window_seconds=window)
+        self.assertAlmostEqual(metrics['top_1_accuracy'], top_1 / len(qa_logs))
+        self.assertAlmostEqual(metrics['manual_top_1_rate'], manual_top_1 / len(qa_logs))
+        self.assertAlmostEqual(metrics['suggestion_hit_rate'], hits / len(qa_logs))
+        self.assertEqual(metrics['clicks'], sum(log['clicked_suggestion'] is not None for log in qa_logs))
+
+
+class TestRankingMetrics(unittest.TestCase):
+
+    def test_matches_reference_implementation(self):
+        """Vectorized metrics agree with a per-impression Python loop, including ragged lists."""
+        rng = random.Random(3)
+        logs = []
+        for i in range(500):
+            shown = rng.sample([f'f{j}' for j in range(12)], rng.randint(0, 6))
+            opened = rng.choice(shown + ['f_missing']) if shown else 'f_missing'
+            logs.append({'user_id': f'u{i % 9}', 'suggestions_shown': shown, 'clicked_suggestion': opened})
+
+        def reference(subset, k):
+            hits = mrr = ndcg = 0.0
+            for log in subset:
+                shown = log['suggestions_shown']
+                if log['clicked_suggestion'] in shown:
+                    rank = shown.index(log['clicked_suggestion']) + 1
+                    mrr += 1 / rank
+                    if rank <= k:
+                        hits += 1
+                        ndcg += 1 / math.log2(rank + 1)
+            return hits / len(subset), mrr / len(subset), ndcg / len(subset)
+
+        encoded = encode_impressions(logs)
+        metrics = ranking_metrics(encoded, ks=(3,))
+        for got, want in zip((metrics['hit@3'], metrics['mrr'], metrics['ndcg@3']), reference(logs, 3)):
+            self.assertAlmostEqual(got, want)
+
+        for user_id, row in per_user_metrics(encoded, ks=(3,)).items():
+            subset = [log for log in logs if log['user_id'] == user_id]
+            self.assertEqual(row['impressions'], len(subset))
+            for got, want in zip((row['hit@3'], row['mrr'], row['ndcg@3']), reference(subset, 3)):
+                self.assertAlmostEqual(got, want)
+
+    def test_empty_input(self):
+        metrics = ranking_metrics(encode_impressions([]))
+        self.assertEqual(metrics['impressions'], 0)
+        self.assertEqual(metrics['mrr'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()